@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Batch directory conversion
+
+Walks a directory tree, transliterates every matching file on a pool of
+worker processes (one per CPU by default) and mirrors the tree into an
+output directory.
+"""
+
+import fnmatch
+import multiprocessing
+import os
+import time
+from typing import NamedTuple, Optional
+
+from transliterate import DETECTION_SAMPLE_SIZE, detect_script, transliterate
+
+
+class FileResult(NamedTuple):
+    """Outcome of converting one file."""
+    source: str
+    target: str
+    chars: int
+    seconds: float
+    error: Optional[str] = None
+
+
+# =============================================================================
+# TREE WALKING
+# =============================================================================
+
+def find_files(source_dir: str, pattern: str = "*.txt", exclude: Optional[str] = None):
+    """
+    Yield paths of files under `source_dir` whose name matches `pattern`.
+
+    Directories are visited in sorted order. `exclude` is a directory to skip,
+    e.g. the output directory when it lives inside the input tree.
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames[:] = sorted(name for name in dirnames
+                             if os.path.abspath(os.path.join(dirpath, name)) != exclude)
+        for filename in sorted(filenames):
+            if fnmatch.fnmatch(filename, pattern):
+                yield os.path.join(dirpath, filename)
+
+
+def mirror_path(path: str, source_dir: str, target_dir: str) -> str:
+    """Path of `path` relative to `source_dir`, re-rooted under `target_dir`."""
+    return os.path.join(target_dir, os.path.relpath(path, source_dir))
+
+
+# =============================================================================
+# CONVERSION
+# =============================================================================
+
+def convert_file(job) -> FileResult:
+    """
+    Transliterate one file; runs inside a worker process.
+
+    Args:
+        job: Tuple of (source, target, direction, encoding)
+
+    Returns:
+        FileResult; I/O and decoding errors are reported, not raised
+    """
+    source, target, direction, encoding = job
+    start = time.perf_counter()
+    try:
+        with open(source, "r", encoding=encoding, newline='') as f:
+            text = f.read()
+        if direction == "auto":
+            # No letters at all: Cyrillic → Latin leaves such text unchanged
+            direction = detect_script(text, DETECTION_SAMPLE_SIZE, default="cyr_to_lat").direction
+        result = transliterate(text, direction)
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        with open(target, "w", encoding=encoding, newline='') as f:
+            f.write(result)
+    except (OSError, UnicodeError) as e:
+        return FileResult(source, target, 0, time.perf_counter() - start, str(e))
+    return FileResult(source, target, len(text), time.perf_counter() - start)
+
+
+def convert_tree(source_dir: str, target_dir: str, direction: str, pattern: str = "*.txt",
+                 workers: Optional[int] = None, encoding: str = "utf-8"):
+    """
+    Transliterate every matching file under `source_dir` into `target_dir`.
+
+    Args:
+        source_dir: Root of the input tree
+        target_dir: Root of the output tree (created as needed)
+        direction: "lat_to_cyr", "cyr_to_lat", or "auto" to detect it per file
+        pattern: File name pattern, e.g. "*.txt"
+        workers: Number of worker processes (default: CPU count)
+        encoding: Text encoding of input and output files
+
+    Yields:
+        FileResult for each file, in completion order
+    """
+    if direction not in ("lat_to_cyr", "cyr_to_lat", "auto"):
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr', 'cyr_to_lat' or 'auto'")
+
+    jobs = ((path, mirror_path(path, source_dir, target_dir), direction, encoding)
+            for path in find_files(source_dir, pattern, exclude=target_dir))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for job in jobs:
+            yield convert_file(job)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        # Small files dominate; batching them keeps inter-process overhead low
+        yield from pool.imap_unordered(convert_file, jobs, chunksize=8)
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Benchmark suite
+
+Measures throughput (chars/sec) and peak memory of the transliteration
+functions on synthetic and realistic Uzbek corpora of several sizes, plus
+the latency of a GUI input update on a large document and the startup time
+of the core import and of the GUI window.
+
+Usage:
+    python bench.py                          # default sizes, print a table
+    python bench.py --sizes 1K 1M 100M --json results.json
+    python bench.py --compare old.json new.json
+
+Results are saved as JSON so runs on different commits can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import transliterate as tr
+
+
+# Realistic corpus: ordinary Uzbek prose with the usual apostrophe mix
+SAMPLE_LATIN = (
+    "O'zbekiston Respublikasi — mustaqil, demokratik respublika. Davlat tili o'zbek tilidir. "
+    "Is'hoq aka bugun ertalab maktabga bordi va o'quvchilarga yangi dars o'tdi. "
+    "Ma'lumki, ma'no va mazmun jihatidan bu asar g'oyat boy. Shahar ko'chalarida "
+    "choyxonalar, bog'lar va yangi binolar ko'p. Yoshlar kelajak uchun o'qiydi, "
+    "ishlaydi va yurtimiz ravnaqiga hissa qo'shadi. Sud majlisida guvohlar so'zlab, "
+    "hujjatlar tekshirildi; qaror 2023-yil 15-martda e’lon qilindi. "
+    "Ra`no opa qo‘shiq aytdi, shoir esa she'r o'qidi.\n"
+)
+
+# Synthetic corpus: words drawn from Uzbek Latin letters and combinations
+SYNTHETIC_UNITS = (
+    list("aaaaabdeeeffghiiiijkllmmnnoooopqrrsstttuuvxyz")
+    + ["sh", "ch", "ng", "yo", "yu", "ya", "o'", "g'", "oʻ", "gʻ", "s'h"]
+)
+
+SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+DEFAULT_SIZES = ["1K", "10K", "100K", "1M", "10M"]
+
+
+# =============================================================================
+# CORPORA
+# =============================================================================
+
+def parse_size(value: str) -> int:
+    """Parse sizes like "1K", "10M" or "512" (characters)."""
+    value = value.strip().upper()
+    if value[-1:] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def realistic_latin(size: int, seed: int = 0) -> str:
+    """Realistic Latin text: sample sentences shuffled into paragraphs, up to `size` chars."""
+    rng = random.Random(seed)
+    sentences = [s.strip() + "." for s in SAMPLE_LATIN.split(".") if s.strip()]
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(sentences)
+        parts.append(sentence + ("\n" if rng.random() < 0.2 else " "))
+        length += len(sentence) + 1
+    return "".join(parts)[:size]
+
+
+def synthetic_latin(size: int, seed: int = 0) -> str:
+    """Synthetic Latin text: random words built from SYNTHETIC_UNITS."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choice(SYNTHETIC_UNITS) for _ in range(rng.randint(2, 6)))
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+def build_corpora(size: int) -> dict:
+    """All corpora of one size, keyed by name."""
+    corpora = {
+        "realistic_latin": realistic_latin(size),
+        "synthetic_latin": synthetic_latin(size),
+    }
+    corpora["realistic_cyrillic"] = tr.latin_to_cyrillic(corpora["realistic_latin"])
+    corpora["synthetic_cyrillic"] = tr.latin_to_cyrillic(corpora["synthetic_latin"])
+    return corpora
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def measure(func, text: str, repeat: int) -> dict:
+    """Best-of-`repeat` time, chars/sec, and peak memory allocated by one call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+
+    # Separate run: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": best,
+        "chars_per_sec": len(text) / best if best else None,
+        "peak_bytes": peak,
+    }
+
+
+def gui_stub():
+    """A TransliteratorApp with its conversion state but no widgets (no display needed)."""
+    from main import TransliteratorApp
+
+    class DirectionVar:
+        def get(self):
+            return "lat_to_cyr"
+
+    app = TransliteratorApp.__new__(TransliteratorApp)
+    app.direction_var = DirectionVar()
+    app.input_lines = [""]
+    app.line_counts = [(0, 0)]
+    app.cyrillic_total = app.latin_total = 0
+    app.output_direction = None
+    app.update_generation = 0
+    return app
+
+
+def measure_gui_update(text: str, repeat: int) -> dict:
+    """
+    Latency of a GUI input update: the initial paste of `text`, then one keystroke.
+
+    With a display, a real (withdrawn) window is driven through the whole
+    update including widget changes. Without one, only the work done off
+    the main loop (diff, counting, conversion) is measured.
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        root = None
+
+    middle = len(text) // 2
+    edited = text[:middle] + "a" + text[middle:]
+
+    if root is None:
+        def update(app, content):
+            app.update_generation += 1
+            result = app.compute_update(app.update_generation, content, None, "lat_to_cyr")
+            app.input_lines = result["lines"]
+            app.line_counts = result["line_counts"]
+            app.cyrillic_total, app.latin_total = result["totals"]
+            app.output_direction = result["direction"]
+
+        def paste(app):
+            update(app, text)
+
+        def keystroke(app):
+            update(app, edited)
+    else:
+        from main import TransliteratorApp
+        root.withdraw()
+
+        def update(app):
+            app.start_update()
+            app.update_future.result()
+            app.poll_update()
+            root.update_idletasks()
+
+        def paste(app):
+            app.input_text.insert("1.0", text)
+            update(app)
+
+        def keystroke(app):
+            app.input_text.insert(f"1.0 + {middle} chars", "a")
+            update(app)
+
+    paste_seconds = keystroke_seconds = float("inf")
+    for _ in range(repeat):
+        app = gui_stub() if root is None else TransliteratorApp(tk.Toplevel(root))
+        start = time.perf_counter()
+        paste(app)
+        paste_seconds = min(paste_seconds, time.perf_counter() - start)
+        start = time.perf_counter()
+        keystroke(app)
+        keystroke_seconds = min(keystroke_seconds, time.perf_counter() - start)
+        if root is not None:
+            app.on_close()
+
+    if root is not None:
+        root.destroy()
+    return {"display": root is not None, "paste_seconds": paste_seconds, "keystroke_seconds": keystroke_seconds}
+
+
+# Startup is measured in fresh interpreters, timed from inside until the
+# core is imported or the first frame of the window has been drawn
+STARTUP_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import transliterate
+print(time.perf_counter() - start, "tkinter" in sys.modules)
+"""
+
+STARTUP_GUI_SCRIPT = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from main import TransliteratorApp
+root = tk.Tk()
+app = TransliteratorApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.on_close()
+"""
+
+
+def run_fresh(script: str):
+    """Run `script` in a new interpreter; returns (wall seconds, printed fields), or None if it failed."""
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds = time.perf_counter() - start
+    return (seconds, done.stdout.split()) if done.returncode == 0 else None
+
+
+def measure_startup(repeat: int, gui: bool) -> list:
+    """
+    Startup cost: importing the core (which must not load tkinter) and, with
+    a display, opening the GUI window. "seconds" is the time spent inside
+    the interpreter, "process_seconds" the whole process including its start.
+    """
+    baseline = min(run_fresh("pass")[0] for _ in range(repeat))
+    runs = [run_fresh(STARTUP_IMPORT_SCRIPT) for _ in range(repeat)]
+    entries = [{
+        "function": "startup: import transliterate", "corpus": "-", "size": 0,
+        "seconds": min(float(fields[0]) for _, fields in runs),
+        "process_seconds": min(seconds for seconds, _ in runs),
+        "interpreter_seconds": baseline,
+        "tkinter": any(fields[1] == "True" for _, fields in runs),
+    }]
+
+    if gui:
+        runs = [run_fresh(STARTUP_GUI_SCRIPT) for _ in range(repeat)]
+        display = all(runs)
+        entries.append({
+            "function": "startup: GUI window", "corpus": "-", "size": 0,
+            "seconds": min(float(fields[0]) for _, fields in runs) if display else None,
+            "process_seconds": min(seconds for seconds, _ in runs) if display else None,
+            "display": display,
+        })
+    return entries
+
+
+def benchmarks() -> dict:
+    """Functions to benchmark, with the corpus each one runs on."""
+    from main import TransliteratorApp
+    stub = gui_stub()
+    return {
+        "latin_to_cyrillic": (tr.latin_to_cyrillic, ["realistic_latin", "synthetic_latin"]),
+        "cyrillic_to_latin": (tr.cyrillic_to_latin, ["realistic_cyrillic", "synthetic_cyrillic"]),
+        "cyrillic_to_latin_fast": (tr.cyrillic_to_latin_fast, ["realistic_cyrillic", "synthetic_cyrillic"]),
+        "normalize_apostrophes": (tr.normalize_apostrophes, ["realistic_latin"]),
+        "detect_script": (tr.detect_script, ["realistic_latin", "realistic_cyrillic"]),
+        "TransliteratorApp.detect_language": (
+            lambda text: TransliteratorApp.detect_language(stub, text),
+            ["realistic_latin", "realistic_cyrillic"],
+        ),
+    }
+
+
+def git_revision():
+    """Current commit hash, if running from a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat: int, gui: bool) -> dict:
+    """Run every benchmark at every size; returns the JSON-ready results."""
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": [],
+    }
+    for entry in measure_startup(repeat, gui):
+        results["results"].append(entry)
+        print_entry(entry)
+    for size_name in sizes:
+        size = parse_size(size_name)
+        corpora = build_corpora(size)
+        for name, (func, corpus_names) in benchmarks().items():
+            for corpus in corpus_names:
+                entry = {"function": name, "corpus": corpus, "size": size}
+                entry.update(measure(func, corpora[corpus], repeat))
+                results["results"].append(entry)
+                print_entry(entry)
+        if gui:
+            entry = {"function": "TransliteratorApp.update", "corpus": "realistic_latin", "size": size}
+            entry.update(measure_gui_update(corpora["realistic_latin"], repeat))
+            results["results"].append(entry)
+            print_entry(entry)
+    return results
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+def print_entry(entry: dict):
+    """Print one result line."""
+    label = f"{entry['function']:<34} {entry['corpus']:<19} {entry['size']:>11,}"
+    if "chars_per_sec" in entry:
+        print(f"{label}  {entry['seconds'] * 1000:>10.2f} ms  {entry['chars_per_sec']:>14,.0f} chars/s"
+              f"  {entry['peak_bytes'] / (1 << 20):>9.2f} MiB peak")
+    elif "process_seconds" in entry:
+        if entry["seconds"] is None:
+            print(f"{label}  (no display)")
+        else:
+            notes = ""
+            if "interpreter_seconds" in entry:
+                notes = f", bare interpreter {entry['interpreter_seconds'] * 1000:.1f} ms"
+                notes += ", loaded tkinter!" if entry["tkinter"] else ", no tkinter"
+            print(f"{label}  {entry['seconds'] * 1000:>10.2f} ms  "
+                  f"(process {entry['process_seconds'] * 1000:.1f} ms{notes})")
+    else:
+        mode = "" if entry["display"] else "  (no display: worker only)"
+        print(f"{label}  paste {entry['paste_seconds'] * 1000:.2f} ms, "
+              f"keystroke {entry['keystroke_seconds'] * 1000:.2f} ms{mode}")
+    sys.stdout.flush()
+
+
+def compare(old_path: str, new_path: str):
+    """Print the speed ratio of every benchmark present in both result files."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    def key(entry):
+        return entry["function"], entry["corpus"], entry["size"]
+
+    def seconds(entry):
+        return entry.get("seconds", entry.get("keystroke_seconds"))
+
+    old_entries = {key(entry): entry for entry in old["results"]}
+    print(f"{old.get('revision')} → {new.get('revision')}")
+    for entry in new["results"]:
+        before = old_entries.get(key(entry))
+        if before and seconds(before) and seconds(entry):
+            print(f"{entry['function']:<34} {entry['corpus']:<19} {entry['size']:>11,}  "
+                  f"{seconds(before) / seconds(entry):>6.2f}x")
+
+
+def main(argv=None) -> int:
+    """Entry point for the benchmark suite."""
+    parser = argparse.ArgumentParser(description="KyrLat benchmark suite")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help="corpus sizes in characters, e.g. 1K 10M 100M")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is kept)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the GUI benchmarks (update latency, window startup)")
+    parser.add_argument("--json", help="save results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    results = run(args.sizes, args.repeat, not args.no_gui)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Command-line interface
+
+Headless transliteration for files and pipes. Input is read in fixed-size
+chunks and written out as soon as each chunk is converted, so memory use
+stays the same no matter how large the file is. Only the transliteration
+core is imported up front; tkinter is loaded by the "gui" command alone.
+
+Usage:
+    python cli.py convert -d lat_to_cyr input.txt -o output.txt
+    cat input.txt | python cli.py convert -d cyr_to_lat > output.txt
+    python cli.py convert -d lat_to_cyr --markup html page.html -o page_cyr.html
+    python cli.py batch -d lat_to_cyr documents/ converted/
+    python cli.py document -d lat_to_cyr report.docx report_cyr.docx
+    python cli.py table -d lat_to_cyr -c name,city customers.csv -o customers_cyr.csv
+    python cli.py roundtrip -j 4 archive/ > roundtrip_report.tsv
+    python cli.py serve --port 8765
+    python cli.py gui
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+
+from transliterate import StreamTransliterator, detect_script
+
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # Characters per read
+DIRECTIONS = ("lat_to_cyr", "cyr_to_lat", "auto")
+
+
+# =============================================================================
+# STREAMING CONVERSION
+# =============================================================================
+
+def convert_stream(source, target, direction: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   markup: Optional[str] = None) -> int:
+    """
+    Transliterate everything readable from `source` into `target`.
+
+    Args:
+        source: Text file object opened for reading
+        target: Text file object opened for writing
+        direction: "lat_to_cyr", "cyr_to_lat", or "auto" to detect it from the first chunk
+        chunk_size: Number of characters read per chunk
+        markup: "html" or "markdown" to leave tags, code and URLs unchanged
+
+    Returns:
+        Number of characters read
+    """
+    chunk = source.read(chunk_size)
+    if markup:
+        from markup import MarkupTransliterator, extract_text
+    if direction == "auto":
+        # No letters at all: Cyrillic → Latin leaves such text unchanged
+        sample = extract_text(chunk, markup) if markup else chunk
+        direction = detect_script(sample, default="cyr_to_lat").direction
+
+    stream = MarkupTransliterator(direction, markup) if markup else StreamTransliterator(direction)
+    total = 0
+    while chunk:
+        total += len(chunk)
+        target.write(stream.feed(chunk))
+        chunk = source.read(chunk_size)
+    target.write(stream.flush())
+    return total
+
+
+def open_text(path: str, mode: str, encoding: str):
+    """Open `path` as text without newline translation; "-" means stdin/stdout."""
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        stream.reconfigure(encoding=encoding, newline='')
+        return stream
+    return open(path, mode, encoding=encoding, newline='')
+
+
+# =============================================================================
+# COMMANDS
+# =============================================================================
+
+def cmd_convert(args) -> int:
+    """Convert input files (or stdin) into one output file (or stdout)."""
+    target = open_text(args.output, "w", args.encoding)
+    try:
+        for path in args.inputs or ["-"]:
+            source = open_text(path, "r", args.encoding)
+            try:
+                convert_stream(source, target, args.direction, args.chunk_size, args.markup)
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+    finally:
+        if target is sys.stdout:
+            target.flush()
+        else:
+            target.close()
+    return 0
+
+
+def cmd_batch(args) -> int:
+    """Convert a directory tree in parallel, reporting throughput."""
+    from batch import convert_tree
+
+    files = chars = failed = 0
+    start = time.perf_counter()
+    for result in convert_tree(args.source, args.target, args.direction, args.pattern,
+                               args.workers, args.encoding):
+        if result.error:
+            failed += 1
+            print(f"FAILED {result.source}: {result.error}", file=sys.stderr)
+            continue
+        files += 1
+        chars += result.chars
+        if not args.quiet:
+            rate = result.chars / result.seconds if result.seconds else 0
+            print(f"{result.source}: {result.chars} chars, {result.seconds * 1000:.1f} ms, {rate:,.0f} chars/s")
+    elapsed = time.perf_counter() - start
+
+    rate = chars / elapsed if elapsed else 0
+    print(f"Converted {files} files ({chars:,} chars) in {elapsed:.2f} s: "
+          f"{files / elapsed if elapsed else 0:,.1f} files/s, {rate:,.0f} chars/s"
+          + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+def cmd_document(args) -> int:
+    """Convert a Word (.docx) or OpenDocument (.odt) file, keeping its formatting."""
+    from documents import DocumentError, convert_document
+
+    start = time.perf_counter()
+    try:
+        chars = convert_document(args.source, args.target, args.direction)
+    except (OSError, ValueError, DocumentError) as e:
+        print(f"FAILED {args.source}: {e}", file=sys.stderr)
+        return 1
+    print(f"{args.source}: {chars:,} chars in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+def cmd_table(args) -> int:
+    """Convert selected columns of a CSV or JSON Lines file, copying everything else."""
+    from tables import TableError, convert_table
+
+    fmt = args.format or ("jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv")
+    columns = [column for column in args.columns.split(",") if column]
+    if fmt == "csv" and args.no_header:
+        columns = [int(column) - 1 for column in columns]  # 1-based, like cut -f
+
+    start = time.perf_counter()
+    source = open_text(args.input, "r", args.encoding)
+    target = open_text(args.output, "w", args.encoding)
+    try:
+        records = convert_table(source, target, args.direction, columns, fmt, args.delimiter,
+                                not args.no_header, args.workers, args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"FAILED {args.input}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        for stream in (source, target):
+            if stream is sys.stdout:
+                stream.flush()
+            elif stream is not sys.stdin:
+                stream.close()
+    elapsed = time.perf_counter() - start
+    print(f"{args.input}: {records:,} records in {elapsed:.2f} s"
+          f" ({records / elapsed if elapsed else 0:,.0f} records/s)", file=sys.stderr)
+    return 0
+
+
+def cmd_roundtrip(args) -> int:
+    """
+    Report the Cyrillic words that do not survive Cyrillic → Latin → Cyrillic.
+
+    Prints one tab-separated line per failing word, most frequent first:
+    count, word, Latin, word read back, and its first positions. With --each,
+    every occurrence is printed as soon as its part of the corpus is checked.
+    """
+    import os
+    from batch import find_files
+    from roundtrip import RoundTripReport, check_files
+
+    def paths():
+        for path in args.inputs:
+            if os.path.isdir(path):
+                yield from find_files(path, args.pattern)
+            else:
+                yield path
+
+    report = RoundTripReport(args.positions)
+    start = time.perf_counter()
+    for result in check_files(paths(), args.workers, args.job_size, args.encoding):
+        if result.error:
+            print(f"FAILED {result.path}: {result.error}", file=sys.stderr)
+        elif args.each:
+            for word, (path, line, column) in result.occurrences:
+                mismatch = result.mismatches[word]
+                print(f"{path}:{line}:{column}\t{word}\t{mismatch.latin}\t{mismatch.back}")
+        report.add(result)
+    elapsed = time.perf_counter() - start
+
+    if not args.each:
+        for mismatch, count, positions in report.most_common():
+            where = ", ".join(f"{path}:{line}:{column}" for path, line, column in positions)
+            print(f"{count}\t{mismatch.word}\t{mismatch.latin}\t{mismatch.back}\t{where}")
+    print(f"Checked {report.words:,} words in {elapsed:.2f} s: {len(report.counts):,} distinct words "
+          f"({report.failures:,} occurrences) do not round-trip"
+          + (f", {len(report.errors)} files failed" if report.errors else ""), file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+def cmd_serve(args) -> int:
+    """Run the HTTP transliteration service until interrupted."""
+    import asyncio
+    from server import TransliterationServer
+
+    async def serve():
+        server = TransliterationServer(args.host, args.port, args.workers, args.max_body_size)
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}", file=sys.stderr)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_loadtest(args) -> int:
+    """Load-test a running service and print throughput and latency percentiles."""
+    import asyncio
+    from server import load_test
+
+    result = asyncio.run(load_test(args.host, args.port, args.requests, args.connections))
+    latency = result["latency_ms"]
+    print(f"{result['requests']} requests ({result['errors']} errors) in {result['seconds']:.2f} s: "
+          f"{result['requests_per_sec']:,.0f} req/s; latency p50 {latency['p50']:.2f} ms, "
+          f"p90 {latency['p90']:.2f} ms, p99 {latency['p99']:.2f} ms, max {latency['max']:.2f} ms")
+    return 1 if result["errors"] else 0
+
+
+def cmd_gui(args) -> int:
+    """Open the desktop window."""
+    from main import main as run_gui
+
+    run_gui()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with one sub-command per mode."""
+    parser = argparse.ArgumentParser(
+        prog="kyrlat",
+        description="Uzbek Cyrillic ↔ Latin transliterator"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="transliterate files or stdin")
+    convert.add_argument("inputs", nargs="*", help="input files (default: stdin, or '-')")
+    convert.add_argument("-d", "--direction", choices=DIRECTIONS, required=True)
+    convert.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    convert.add_argument("--encoding", default="utf-8")
+    convert.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                         help="characters read per chunk")
+    convert.add_argument("--markup", choices=("html", "markdown"),
+                         help="only transliterate text, leaving tags, code and URLs unchanged")
+    convert.set_defaults(handler=cmd_convert)
+
+    batch = commands.add_parser("batch", help="transliterate a directory tree in parallel")
+    batch.add_argument("source", help="input directory")
+    batch.add_argument("target", help="output directory (mirrors the input tree)")
+    batch.add_argument("-d", "--direction", choices=DIRECTIONS, required=True)
+    batch.add_argument("--pattern", default="*.txt", help="file name pattern (default: *.txt)")
+    batch.add_argument("-j", "--workers", type=int, default=None,
+                       help="worker processes (default: CPU count)")
+    batch.add_argument("--encoding", default="utf-8")
+    batch.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    batch.set_defaults(handler=cmd_batch)
+
+    document = commands.add_parser("document", help="transliterate a .docx or .odt file, keeping formatting")
+    document.add_argument("source", help="input document")
+    document.add_argument("target", help="output document")
+    document.add_argument("-d", "--direction", choices=DIRECTIONS, required=True)
+    document.set_defaults(handler=cmd_document)
+
+    table = commands.add_parser("table", help="transliterate selected CSV columns or JSON Lines fields")
+    table.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    table.add_argument("-d", "--direction", choices=DIRECTIONS, required=True)
+    table.add_argument("-c", "--columns", required=True,
+                       help="comma-separated column names (1-based numbers with --no-header) or JSON keys")
+    table.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    table.add_argument("--format", choices=("csv", "jsonl"),
+                       help="default: jsonl for .jsonl/.ndjson files, else csv")
+    table.add_argument("--delimiter", default=",", help="CSV field delimiter (default: ,)")
+    table.add_argument("--no-header", action="store_true", help="the CSV has no header record")
+    table.add_argument("-j", "--workers", type=int, default=1,
+                       help="worker processes (default: 1, 0 for CPU count)")
+    table.add_argument("--chunk-size", type=int, default=10000, help="records per chunk")
+    table.add_argument("--encoding", default="utf-8")
+    table.set_defaults(handler=cmd_table)
+
+    roundtrip = commands.add_parser("roundtrip", help="find Cyrillic words that do not survive a round trip")
+    roundtrip.add_argument("inputs", nargs="+", help="Cyrillic files or directories")
+    roundtrip.add_argument("--pattern", default="*.txt", help="file name pattern in directories (default: *.txt)")
+    roundtrip.add_argument("-j", "--workers", type=int, default=None,
+                           help="worker processes (default: CPU count)")
+    roundtrip.add_argument("--job-size", type=int, default=4 << 20, help="bytes of a file checked per job")
+    roundtrip.add_argument("--positions", type=int, default=10, help="positions listed per word")
+    roundtrip.add_argument("--each", action="store_true", help="print every occurrence as it is found")
+    roundtrip.add_argument("--encoding", default="utf-8")
+    roundtrip.set_defaults(handler=cmd_roundtrip)
+
+    serve = commands.add_parser("serve", help="run the local HTTP transliteration service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("-j", "--workers", type=int, default=None,
+                       help="worker processes (default: CPU count)")
+    serve.add_argument("--max-body-size", type=int, default=8 << 20, help="bytes per request body")
+    serve.set_defaults(handler=cmd_serve)
+
+    loadtest = commands.add_parser("loadtest", help="measure a running service")
+    loadtest.add_argument("--host", default="127.0.0.1")
+    loadtest.add_argument("--port", type=int, default=8765)
+    loadtest.add_argument("-n", "--requests", type=int, default=1000)
+    loadtest.add_argument("-c", "--connections", type=int, default=8)
+    loadtest.set_defaults(handler=cmd_loadtest)
+
+    gui = commands.add_parser("gui", help="open the desktop window")
+    gui.set_defaults(handler=cmd_gui)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """Entry point for the command-line interface."""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
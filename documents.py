@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Word and OpenDocument conversion
+
+Transliterates .docx and .odt files while keeping their formatting. The
+document is a zip archive: XML parts holding text are streamed through an
+incremental (SAX) parser and rewritten event by event, everything else is
+copied unchanged. Only one paragraph is ever held in memory, so large
+reports convert in bounded memory.
+"""
+
+import io
+import os
+import re
+import shutil
+import zipfile
+from typing import NamedTuple
+from xml.sax import SAXException, handler, make_parser
+from xml.sax.saxutils import XMLGenerator
+
+from transliterate import DETECTION_SAMPLE_SIZE, detect_script, transliterate_pieces
+
+
+class DocumentError(Exception):
+    """The input is not a readable .docx/.odt archive."""
+
+
+class DocumentFormat(NamedTuple):
+    """Where the text lives inside one kind of document archive."""
+    name: str
+    parts: re.Pattern        # Archive members to transliterate
+    paragraphs: frozenset    # Elements whose text is converted as one run of text
+    text: frozenset          # Elements holding text; empty means all text in a paragraph
+    breaks: frozenset        # Elements that separate text (tabs, line breaks, ...)
+
+
+DOCX = DocumentFormat(
+    name="docx",
+    parts=re.compile(r"word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml"),
+    paragraphs=frozenset({"w:p", "a:p"}),
+    # w:instrText (field codes) and m:t (math) are left alone
+    text=frozenset({"w:t", "a:t"}),
+    breaks=frozenset({"w:tab", "w:br", "w:cr", "w:sym", "w:noBreakHyphen", "w:drawing",
+                      "w:object", "w:fldChar", "w:footnoteReference", "w:endnoteReference",
+                      "a:br"}),
+)
+
+ODT = DocumentFormat(
+    name="odt",
+    # Headers and footers live in the master pages of styles.xml
+    parts=re.compile(r"(content|styles)\.xml"),
+    paragraphs=frozenset({"text:p", "text:h"}),
+    text=frozenset(),
+    breaks=frozenset({"text:s", "text:tab", "text:line-break", "text:note", "draw:frame"}),
+)
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+ZIP64_THRESHOLD = (1 << 31) - 1
+COPY_BUFFER_SIZE = 1 << 20
+WRITE_BUFFER_SIZE = 1 << 16  # Characters of XML collected before each write
+
+
+def document_format(archive: zipfile.ZipFile) -> DocumentFormat:
+    """Tell a .docx from an .odt by the members of the archive."""
+    names = set(archive.namelist())
+    if "word/document.xml" in names:
+        return DOCX
+    if "content.xml" in names and "mimetype" in names:
+        return ODT
+    raise DocumentError("Not a DOCX or ODT document")
+
+
+# =============================================================================
+# XML STREAMING
+# =============================================================================
+
+class _ParagraphWriter(handler.ContentHandler):
+    """
+    SAX handler that copies XML to `target`, transliterating paragraph text.
+
+    Events outside paragraphs are written straight through. Inside a
+    paragraph they are buffered until it ends, so text split over several
+    runs ("s" in a bold run, "h" in the next) is converted as one string and
+    each run keeps the output of its own characters.
+    """
+
+    def __init__(self, target, direction: str, doc_format: DocumentFormat):
+        super().__init__()
+        # Serialized into a string buffer and written out in large blocks
+        self.target = target
+        self.buffer = io.StringIO()
+        self.buffer.write(XML_DECLARATION)
+        self.writer = XMLGenerator(self.buffer, "utf-8", short_empty_elements=True)
+        self.direction = direction
+        self.format = doc_format
+        self.events = []      # Buffered (method, args) of the current paragraph
+        self.segments = [[]]  # Per uninterrupted run of text: indices of its text events
+        self.depth = 0        # Paragraph nesting (text boxes, notes)
+        self.text_depth = 0   # Nesting of text elements
+        self.chars = 0
+
+    def drain(self):
+        """Write out what has been serialized so far."""
+        self.target.write(self.buffer.getvalue().encode("utf-8"))
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+    def emit(self, method, *args):
+        if self.depth:
+            self.events.append((method, list(args)))
+        else:
+            method(*args)
+
+    def break_segment(self):
+        if self.segments[-1]:
+            self.segments.append([])
+
+    def startElement(self, name, attrs):
+        if name in self.format.paragraphs:
+            self.depth += 1
+            self.break_segment()
+        elif name in self.format.breaks:
+            self.break_segment()
+        if name in self.format.text:
+            self.text_depth += 1
+        # The parser passes a fresh attributes object per element, safe to buffer
+        self.emit(self.writer.startElement, name, attrs)
+
+    def endElement(self, name):
+        self.emit(self.writer.endElement, name)
+        if name in self.format.text:
+            self.text_depth -= 1
+        if name in self.format.paragraphs:
+            self.break_segment()
+            self.depth -= 1
+            if not self.depth:
+                self.flush_paragraph()
+
+    def characters(self, content):
+        if self.depth and (self.text_depth or not self.format.text):
+            self.segments[-1].append(len(self.events))
+            self.chars += len(content)
+        self.emit(self.writer.characters, content)
+
+    def ignorableWhitespace(self, whitespace):
+        self.emit(self.writer.ignorableWhitespace, whitespace)
+
+    def processingInstruction(self, target, data):
+        self.emit(self.writer.processingInstruction, target, data)
+
+    def endDocument(self):
+        self.writer.endDocument()
+        self.drain()
+
+    def flush_paragraph(self):
+        """Transliterate the buffered paragraph and write it out."""
+        for segment in self.segments:
+            if not segment:
+                continue
+            pieces = [self.events[index][1][0] for index in segment]
+            for index, output in zip(segment, transliterate_pieces(pieces, self.direction)):
+                self.events[index][1][0] = output
+        for method, args in self.events:
+            method(*args)
+        self.events = []
+        self.segments = [[]]
+        if self.buffer.tell() >= WRITE_BUFFER_SIZE:
+            self.drain()
+
+
+class _SampleComplete(Exception):
+    """Raised to stop parsing once enough text has been sampled."""
+
+
+class _TextSampler(handler.ContentHandler):
+    """SAX handler that collects the first `size` characters of paragraph text."""
+
+    def __init__(self, doc_format: DocumentFormat, size: int):
+        super().__init__()
+        self.format = doc_format
+        self.size = size
+        self.parts = []
+        self.length = 0
+        self.depth = 0
+        self.text_depth = 0
+
+    def startElement(self, name, attrs):
+        self.depth += name in self.format.paragraphs
+        self.text_depth += name in self.format.text
+
+    def endElement(self, name):
+        self.depth -= name in self.format.paragraphs
+        self.text_depth -= name in self.format.text
+
+    def characters(self, content):
+        if self.depth and (self.text_depth or not self.format.text):
+            self.parts.append(content)
+            self.length += len(content)
+            if self.length >= self.size:
+                raise _SampleComplete()
+
+
+def convert_part(source, target, direction: str, doc_format: DocumentFormat) -> int:
+    """
+    Stream one XML part from `source` to `target` (binary file objects).
+
+    Returns:
+        Number of text characters transliterated
+    """
+    writer = _ParagraphWriter(target, direction, doc_format)
+    parser = make_parser()
+    parser.setContentHandler(writer)
+    parser.parse(source)
+    return writer.chars
+
+
+def sample_document(archive: zipfile.ZipFile, doc_format: DocumentFormat,
+                    size: int = DETECTION_SAMPLE_SIZE) -> str:
+    """The first `size` characters of text in the document body, for script detection."""
+    main_part = "word/document.xml" if doc_format is DOCX else "content.xml"
+    sampler = _TextSampler(doc_format, size)
+    parser = make_parser()
+    parser.setContentHandler(sampler)
+    with archive.open(main_part) as source:
+        try:
+            parser.parse(source)
+        except _SampleComplete:
+            pass
+    return ''.join(sampler.parts)
+
+
+# =============================================================================
+# DOCUMENT CONVERSION
+# =============================================================================
+
+def _member_info(info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+    """A fresh ZipInfo with the name, date, compression and attributes of `info`."""
+    copy = zipfile.ZipInfo(info.filename, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.external_attr = info.external_attr
+    copy.create_system = info.create_system
+    copy.comment = info.comment
+    return copy
+
+
+def convert_document(source: str, target: str, direction: str) -> int:
+    """
+    Transliterate a .docx or .odt file into a new file with the same formatting.
+
+    Args:
+        source: Path of the input document
+        target: Path of the output document (must differ from `source`)
+        direction: "lat_to_cyr", "cyr_to_lat", or "auto" to detect it from the body text
+
+    Returns:
+        Number of text characters transliterated
+    """
+    if direction not in ("lat_to_cyr", "cyr_to_lat", "auto"):
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr', 'cyr_to_lat' or 'auto'")
+    if os.path.abspath(source) == os.path.abspath(target):
+        raise ValueError("Output document must differ from the input document")
+
+    try:
+        with zipfile.ZipFile(source) as archive:
+            doc_format = document_format(archive)
+            if direction == "auto":
+                # No letters at all: Cyrillic → Latin leaves such text unchanged
+                sample = sample_document(archive, doc_format)
+                direction = detect_script(sample, default="cyr_to_lat").direction
+            try:
+                return _write_archive(archive, target, direction, doc_format)
+            except BaseException:
+                # Don't leave a truncated document behind
+                os.remove(target)
+                raise
+    except (zipfile.BadZipFile, SAXException) as e:
+        raise DocumentError(str(e)) from e
+
+
+def _write_archive(archive: zipfile.ZipFile, target: str, direction: str, doc_format: DocumentFormat) -> int:
+    """Write the transliterated copy of `archive` to `target`."""
+    chars = 0
+    with zipfile.ZipFile(target, "w") as output:
+        # Member order is kept: ODT needs its uncompressed "mimetype" first
+        for info in archive.infolist():
+            convert = doc_format.parts.fullmatch(info.filename) is not None
+            # Cyrillic → Latin can double the size of a part
+            large = info.file_size * 2 > ZIP64_THRESHOLD
+            with archive.open(info) as src, output.open(_member_info(info), "w", force_zip64=large) as dst:
+                if convert:
+                    chars += convert_part(src, dst, direction, doc_format)
+                else:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+    return chars
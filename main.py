@@ -10,9 +10,18 @@ Author: KyrLat Project
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
-from transliterate import transliterate
+from transliterate import count_scripts, detect_script, transliterate, transliterate_stream
+
+
+# Input changes are coalesced: conversion starts once typing pauses this long
+DEBOUNCE_MS = 120
+# How often the main loop checks whether the worker thread has finished
+POLL_MS = 15
+# Characters converted per step on the worker, so it can be abandoned quickly
+WORKER_CHUNK_SIZE = 1 << 16
 
 
 # =============================================================================
@@ -50,6 +59,22 @@ class TransliteratorApp:
     def __init__(self, root: tk.Tk):
         self.root = root
         self.auto_detect_enabled = True
+        
+        # Incremental state: input lines last converted, their script counts,
+        # and the direction the output widget currently reflects
+        self.input_lines = [""]
+        self.line_counts = [(0, 0)]
+        self.cyrillic_total = 0
+        self.latin_total = 0
+        self.output_direction = None
+        
+        # Conversion runs on one worker thread; results of any update older
+        # than `update_generation` are stale and get discarded
+        self.worker = ThreadPoolExecutor(max_workers=1)
+        self.update_generation = 0
+        self.update_future = None
+        self.update_after_id = None
+        
         self.setup_window()
         self.apply_styles()
         self.create_widgets()
@@ -407,8 +432,15 @@ class TransliteratorApp:
     
     def setup_live_transliteration(self):
         """Set up live transliteration on input changes."""
-        self.input_text.bind("<KeyRelease>", lambda e: self.on_input_change())
-        self.input_text.bind("<ButtonRelease>", lambda e: self.on_input_change())
+        # <<Modified>> fires only when the content really changes (not on
+        # cursor movement or clicks); the flag is reset after each change
+        def on_modified(event):
+            if self.input_text.edit_modified():
+                self.input_text.edit_modified(False)
+                self.on_input_change()
+        
+        self.input_text.bind("<<Modified>>", on_modified)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Handle all keyboard shortcuts via keycode (works on any layout)
         def on_key_press(event):
@@ -439,7 +471,6 @@ class TransliteratorApp:
                         except tk.TclError:
                             pass
                         self.input_text.insert(tk.INSERT, text)
-                        self.root.after(10, self.on_input_change)
                     except tk.TclError:
                         pass  # Empty clipboard
                     return 'break'
@@ -450,30 +481,24 @@ class TransliteratorApp:
                         self.root.clipboard_clear()
                         self.root.clipboard_append(text)
                         self.input_text.delete(tk.SEL_FIRST, tk.SEL_LAST)
-                        self.root.after(10, self.on_input_change)
                     except tk.TclError:
                         pass  # No selection
                     return 'break'
         
         self.input_text.bind("<KeyPress>", on_key_press)
     
-    def detect_language(self, text: str) -> str:
-        """Detect whether text is mostly Cyrillic or Latin."""
-        if not text.strip():
-            return self.direction_var.get()
-        
-        cyrillic_count = sum(1 for c in text if '\u0400' <= c <= '\u04FF')
-        latin_count = sum(1 for c in text if ('a' <= c.lower() <= 'z'))
-        
-        uzbek_latin_markers = ['gʻ', 'oʻ', 'sh', 'ch', 'ng', 'yo', 'yu', 'ya']
-        uzbek_latin_count = sum(text.lower().count(marker) for marker in uzbek_latin_markers)
-        
+    def direction_for_counts(self, cyrillic_count: int, latin_count: int, fallback: str = None) -> str:
+        """Pick a direction from letter counts, keeping `fallback` (the current one) if undecided."""
         if cyrillic_count > latin_count:
             return 'cyr_to_lat'
-        elif latin_count > 0 or uzbek_latin_count > 0:
+        elif latin_count > 0:
             return 'lat_to_cyr'
         else:
-            return self.direction_var.get()
+            return fallback or self.direction_var.get()
+    
+    def detect_language(self, text: str) -> str:
+        """Detect whether text is mostly Cyrillic or Latin."""
+        return detect_script(text, default=self.direction_var.get()).direction
     
     def update_char_count(self, text: str):
         """Update character counter display."""
@@ -481,25 +506,141 @@ class TransliteratorApp:
         self.char_count_label.config(text=f"{count} белги")
     
     def on_input_change(self):
-        """Called whenever input text changes."""
-        input_content = self.input_text.get("1.0", tk.END).strip()
+        """Called whenever input text changes; schedules a (debounced) update."""
+        self.schedule_update()
+    
+    def schedule_update(self, delay: int = DEBOUNCE_MS):
+        """Start an update after `delay` ms, replacing any update already scheduled."""
+        if self.update_after_id is not None:
+            self.root.after_cancel(self.update_after_id)
+        self.update_after_id = self.root.after(delay, self.start_update)
+    
+    def start_update(self):
+        """Snapshot the input and hand it to the worker thread."""
+        self.update_after_id = None
+        self.update_generation += 1
+        if self.update_future is not None:
+            self.update_future.cancel()  # Only succeeds if it has not started yet
+        
+        fallback = self.direction_var.get()
+        direction = None if self.auto_detect_var.get() else fallback
+        self.update_future = self.worker.submit(
+            self.compute_update, self.update_generation,
+            self.input_text.get("1.0", "end-1c"), direction, fallback
+        )
+        self.root.after(POLL_MS, self.poll_update)
+    
+    def compute_update(self, generation: int, input_content: str, direction: str, fallback: str):
+        """
+        Work out the changes for one input snapshot; runs on the worker thread.
+        
+        Only the lines that differ from the last applied update are re-counted
+        and re-transliterated. Output line N is always the transliteration of
+        input line N. Must not touch any widget. Returns None if superseded.
+        """
+        lines = input_content.split("\n")
+        old_lines = self.input_lines
+        old_counts = self.line_counts
+        
+        # Changed region: lines[start:new_end] replaces old_lines[start:old_end]
+        start = 0
+        limit = min(len(lines), len(old_lines))
+        while start < limit and lines[start] == old_lines[start]:
+            start += 1
+        old_end, new_end = len(old_lines), len(lines)
+        while old_end > start and new_end > start and lines[new_end - 1] == old_lines[old_end - 1]:
+            old_end -= 1
+            new_end -= 1
+        
+        cyrillic_total, latin_total = self.cyrillic_total, self.latin_total
+        for cyrillic_count, latin_count in old_counts[start:old_end]:
+            cyrillic_total -= cyrillic_count
+            latin_total -= latin_count
+        counts = []
+        for line in lines[start:new_end]:
+            if generation != self.update_generation:
+                return None
+            counts.append(count_scripts(line))
+        for cyrillic_count, latin_count in counts:
+            cyrillic_total += cyrillic_count
+            latin_total += latin_count
+        
+        detected = direction is None
+        if detected:
+            direction = self.direction_for_counts(cyrillic_total, latin_total, fallback)
+        
+        # Whole output is rebuilt when the direction changes
+        full = direction != self.output_direction
+        text = input_content if full else "\n".join(lines[start:new_end])
+        chunks = (text[i:i + WORKER_CHUNK_SIZE] for i in range(0, len(text), WORKER_CHUNK_SIZE))
+        pieces = []
+        for piece in transliterate_stream(chunks, direction):
+            if generation != self.update_generation:
+                return None
+            pieces.append(piece)
+        
+        return {
+            'generation': generation,
+            'input_content': input_content,
+            'lines': lines,
+            'line_counts': old_counts[:start] + counts + old_counts[old_end:],
+            'totals': (cyrillic_total, latin_total),
+            'direction': direction,
+            'detected': detected,
+            'full': full,
+            'region': (start, old_end, len(old_lines), new_end > start),
+            'result': ''.join(pieces),
+        }
+    
+    def poll_update(self):
+        """Apply the worker's result on the main loop once it is ready."""
+        future = self.update_future
+        if future is None:
+            return
+        if not future.done():
+            self.root.after(POLL_MS, self.poll_update)
+            return
         
-        self.update_char_count(input_content)
+        self.update_future = None
+        if future.cancelled():
+            return
+        try:
+            update = future.result()
+        except Exception as e:
+            messagebox.showerror("Хатолик", f"Транслитерация хатоси: {str(e)}")
+            return
+        if update is not None and update['generation'] == self.update_generation:
+            self.apply_update(update)
+    
+    def apply_update(self, update: dict):
+        """Show a computed update in the widgets and make it the new baseline."""
+        self.input_lines = update['lines']
+        self.line_counts = update['line_counts']
+        self.cyrillic_total, self.latin_total = update['totals']
         
-        if self.auto_detect_var.get():
-            detected_direction = self.detect_language(input_content)
-            self.direction_var.set(detected_direction)
+        self.update_char_count(update['input_content'])
+        
+        direction = update['direction']
+        if update['detected']:
+            self.direction_var.set(direction)
             # Sync display value
-            self.direction_display_var.set(self.direction_map_reverse[detected_direction])
+            self.direction_display_var.set(self.direction_map_reverse[direction])
             
-            if detected_direction == 'lat_to_cyr':
+            if direction == 'lat_to_cyr':
                 self.detect_status_label.config(text="● Lotin")
             else:
                 self.detect_status_label.config(text="● Кирилл")
         else:
             self.detect_status_label.config(text="")
         
-        self.do_transliterate()
+        if update['full']:
+            self.output_text.configure(state=tk.NORMAL)
+            self.output_text.delete("1.0", tk.END)
+            self.output_text.insert("1.0", update['result'])
+            self.output_text.configure(state=tk.DISABLED)
+            self.output_direction = direction
+        elif update['region'][0] < update['region'][1] or update['region'][3]:
+            self.replace_output_lines(*update['region'], update['result'])
     
     def toggle_auto_detect(self):
         """Toggle auto-detection on/off."""
@@ -509,27 +650,33 @@ class TransliteratorApp:
             self.detect_status_label.config(text="")
     
     def do_transliterate(self):
-        """Perform transliteration on input text."""
-        input_content = self.input_text.get("1.0", tk.END).strip()
-        
-        if not input_content:
-            self.output_text.configure(state=tk.NORMAL)
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.configure(state=tk.DISABLED)
-            return
-        
-        direction = self.direction_var.get()
-        
-        try:
-            result = transliterate(input_content, direction)
-            
-            self.output_text.configure(state=tk.NORMAL)
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert("1.0", result)
-            self.output_text.configure(state=tk.DISABLED)
+        """Transliterate the whole input text again, replacing all output."""
+        self.output_direction = None
+        self.schedule_update(delay=0)
+    
+    def replace_output_lines(self, start: int, old_end: int, old_count: int, has_new_lines: bool, result: str):
+        """
+        Replace output lines [start, old_end) with `result`.
         
-        except Exception as e:
-            messagebox.showerror("Хатолик", f"Транслитерация хатоси: {str(e)}")
+        Line numbers are 0-based; old_count is how many lines the output holds.
+        `result` is the transliteration of the new lines (if any), newline-joined.
+        """
+        self.output_text.configure(state=tk.NORMAL)
+        if old_end < old_count:
+            # Lines follow the changed region: replace whole lines with newlines
+            self.output_text.delete(f"{start + 1}.0", f"{old_end + 1}.0")
+            if has_new_lines:
+                self.output_text.insert(f"{start + 1}.0", result + "\n")
+        elif not has_new_lines:
+            # Trailing lines removed: also drop the newline before them
+            self.output_text.delete(f"{start}.end", "end-1c")
+        elif start < old_count:
+            self.output_text.delete(f"{start + 1}.0", "end-1c")
+            self.output_text.insert(f"{start + 1}.0", result)
+        else:
+            # Lines appended after the old last line
+            self.output_text.insert("end-1c", "\n" + result)
+        self.output_text.configure(state=tk.DISABLED)
     
     def copy_to_clipboard(self):
         """Copy output text to clipboard."""
@@ -548,10 +695,8 @@ class TransliteratorApp:
     def clear_all(self):
         """Clear both input and output areas."""
         self.input_text.delete("1.0", tk.END)
-        self.output_text.configure(state=tk.NORMAL)
-        self.output_text.delete("1.0", tk.END)
-        self.output_text.configure(state=tk.DISABLED)
-        self.update_char_count("")
+        # Output follows input line by line, so this empties it as well
+        self.on_input_change()
     
     def swap_text(self):
         """Swap output text to input and toggle direction."""
@@ -575,9 +720,16 @@ class TransliteratorApp:
             self.output_text.configure(state=tk.NORMAL)
             self.output_text.delete("1.0", tk.END)
             self.output_text.configure(state=tk.DISABLED)
+            self.output_direction = None  # Output no longer matches input
             
             self.auto_detect_var.set(auto_detect_was_on)
             self.on_input_change()
+    
+    def on_close(self):
+        """Abandon any conversion in progress and close the window."""
+        self.update_generation += 1  # Makes a running worker job stop early
+        self.worker.shutdown(wait=False)
+        self.root.destroy()
 
 
 def main():
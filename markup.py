@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Markup-aware transliteration
+
+Transliterates the human text of HTML and Markdown while passing markup
+through unchanged: tags and their attributes, comments, entities, script
+and style blocks, inline and fenced code, link targets, URLs and e-mail
+addresses. The input is tokenized in a single regex scan; all text between
+protected tokens is then transliterated in one call.
+"""
+
+import re
+
+from transliterate import transliterate
+
+
+SYNTAXES = ("html", "markdown")
+
+# Joins text segments for one transliterate() call; never part of a combination
+_SEPARATOR = '\x00'
+
+
+# =============================================================================
+# TOKENIZER
+# Markup tokens are (kind, regex) pairs tried in order at each position.
+# "Open" tokens are constructs that start but do not end before the end of
+# the buffer (an unclosed comment, a fence without its closing line); each
+# one follows the complete form of its construct. When more input may
+# follow, conversion stops at an open token and waits for it to close.
+# =============================================================================
+
+_ATTRIBUTES = r"""(?:"[^"]*"|'[^']*'|[^'">])*"""
+
+_RAW_ELEMENTS = "script|style|code|pre|kbd|samp"
+
+_URL_END = r"""[^\s<>"'`ʻʼ’‘.,;:!?)\]]"""
+
+# URLs and e-mail addresses in running text. They can start at any letter,
+# so they are looked for only inside text segments that contain a marker.
+_LINKS = re.compile(
+    r"\b(?:https?://|ftp://|www\.)[^\s<>\"'`ʻʼ’‘]*" + _URL_END
+    + r"|(?<![\w.+-])[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+)
+_LINK_MARKERS = ("@", "://", "www.")
+
+_COMMON_TOKENS = [
+    # Character references: &nbsp; &#169; &#xA9;
+    ("protected", r"&(?:[A-Za-z][A-Za-z0-9]*|\#[0-9]+|\#[xX][0-9A-Fa-f]+);"),
+]
+
+_HTML_TOKENS = [
+    ("protected", r"<!--.*?-->"),
+    ("open", r"<!--.*\Z"),
+    # Elements whose content is code, not text
+    ("protected", r"(?i:<(?P<raw>" + _RAW_ELEMENTS + r")\b" + _ATTRIBUTES + r">.*?</(?P=raw)\s*>)"),
+    ("open", r"(?i:<(?P<raw_open>" + _RAW_ELEMENTS + r")\b(?:(?!</(?P=raw_open)\s*>).)*\Z)"),
+    # Tags, doctype, processing instructions (attributes included)
+    ("protected", r"<[A-Za-z/!?]" + _ATTRIBUTES + r">"),
+    ("open", r"<[A-Za-z/!?]" + _ATTRIBUTES + r"""(?:"[^"]*|'[^']*)?\Z"""),
+]
+
+_MARKDOWN_TOKENS = [
+    # Fenced code block, up to a closing fence of the same kind; a fence
+    # that is never closed runs to the end of the document
+    ("protected", r"^[ ]{0,3}(?P<fence>`{3,}(?!`)|~{3,}(?!~))[^\n]*\n.*?^[ ]{0,3}(?P=fence)[ \t]*$"),
+    ("open", r"^[ ]{0,3}(?P<fence_open>`{3,}(?!`)|~{3,}(?!~))(?:(?!^[ ]{0,3}(?P=fence_open)[ \t]*$).)*\Z"),
+    # Inline code on one line, closed by a backtick run of the same length
+    ("protected", r"(?<!`)(?P<ticks>`+)(?!`)[^\n]*?(?<!`)(?P=ticks)(?!`)"),
+    ("open", r"(?<!`)(?P<ticks_open>`+)(?!`)(?:(?!(?<!`)(?P=ticks_open)(?!`))[^\n])*\Z"),
+    # Link and image targets: the "(url "title")" after "[text]"
+    ("protected", r"\]\([ \t]*(?:<[^>\n]*>|[^\s()]*(?:\([^\s()]*\)[^\s()]*)*)"
+                  r"(?:[ \t]+(?:\"[^\"\n]*\"|'[^'\n]*'|\([^)\n]*\)))?[ \t]*\)"),
+    # Reference definitions: [id]: url "title"
+    ("protected", r"^[ ]{0,3}\[[^\]\n]+\]:[^\n]*$"),
+]
+
+
+def _compile(tokens, first: str):
+    """
+    One scanner regex; the name of the matching group starts with the token kind.
+
+    `first` holds every character a token can start with. Leading with it lets
+    the regex engine skip through plain text instead of trying each token.
+    """
+    source = "|".join(f"(?P<{kind}{index}>{regex})" for index, (kind, regex) in enumerate(tokens))
+    return re.compile(f"(?=[{re.escape(first)}])(?:{source})", re.DOTALL | re.MULTILINE)
+
+
+_PATTERNS = {
+    "html": _compile(_HTML_TOKENS + _COMMON_TOKENS, "<&"),
+    # Markdown allows inline HTML, so its tokens come along
+    "markdown": _compile(_MARKDOWN_TOKENS + _HTML_TOKENS + _COMMON_TOKENS, "<&`~[] "),
+}
+
+
+def _pattern(syntax: str):
+    if syntax not in _PATTERNS:
+        raise ValueError(f"Unknown markup syntax: {syntax}. Use 'html' or 'markdown'")
+    return _PATTERNS[syntax]
+
+
+def _word_boundary(text: str, start: int, end: int) -> int:
+    """
+    The last position in text[start:end] after which no word or token can continue.
+
+    Whitespace and ">" end words. Indentation stays with its line, since
+    Markdown fences and definitions must start one; `start` is always safe.
+    """
+    limit = max(text.rfind(' ', start, end), text.rfind('\n', start, end),
+                text.rfind('\t', start, end), text.rfind('>', start, end)) + 1
+    line_start = text.rfind('\n', 0, limit) + 1
+    if not text[line_start:limit].strip(' \t'):
+        limit = line_start
+    return max(limit, start)
+
+
+def _split_links(text: str, start: int, end: int, texts: list, tokens: list):
+    """Append text[start:end] to `texts`, with its URLs and e-mail addresses as tokens."""
+    segment = text[start:end]
+    if any(marker in segment for marker in _LINK_MARKERS):
+        for match in _LINKS.finditer(text, start, end):
+            texts.append(text[start:match.start()])
+            tokens.append(match.group())
+            start = match.end()
+        segment = text[start:end]
+    texts.append(segment)
+
+
+def tokenize(text: str, syntax: str, final: bool = True, start: int = 0):
+    """
+    Split markup into text segments and protected tokens.
+
+    Args:
+        text: HTML or Markdown source
+        syntax: "html" or "markdown"
+        final: False if more input may follow `text`; unfinished tokens and
+            the last partial word are then left unconsumed
+        start: Where to start; text before it is only context for line
+            starts and word boundaries
+
+    Returns:
+        (texts, tokens, consumed): text segments and protected tokens
+        alternate, starting and ending with a (possibly empty) text segment;
+        text[consumed:] must be fed again with more input.
+    """
+    pattern = _pattern(syntax)
+    limit = len(text) if final else _word_boundary(text, start, len(text))
+
+    texts = []
+    tokens = []
+    position = start
+    for match in pattern.finditer(text, start):
+        if match.start() >= limit:
+            break
+        # A token reaching the end of the buffer may continue in the next chunk,
+        # and may turn out to be text joining the word before it
+        if not final and (match.lastgroup.startswith("open") or match.end() >= limit):
+            limit = _word_boundary(text, position, match.start())
+            break
+        _split_links(text, position, match.start(), texts, tokens)
+        tokens.append(match.group())
+        position = match.end()
+    _split_links(text, position, limit, texts, tokens)
+    return texts, tokens, limit
+
+
+def extract_text(text: str, syntax: str) -> str:
+    """The human text of a markup document, e.g. for script detection."""
+    texts, _, _ = tokenize(text, syntax)
+    return ' '.join(texts)
+
+
+# =============================================================================
+# TRANSLITERATION
+# =============================================================================
+
+def _convert(text: str, direction: str, syntax: str, final: bool, start: int = 0):
+    """Transliterate the text segments of `text`; returns (output, consumed)."""
+    texts, tokens, consumed = tokenize(text, syntax, final, start)
+    if _SEPARATOR in text:
+        converted = [transliterate(segment, direction) for segment in texts]
+    else:
+        converted = transliterate(_SEPARATOR.join(texts), direction).split(_SEPARATOR)
+    output = [None] * (len(converted) + len(tokens))
+    output[::2] = converted
+    output[1::2] = tokens
+    return ''.join(output), consumed
+
+
+def transliterate_markup(text: str, direction: str, syntax: str = "html") -> str:
+    """
+    Transliterate the human text of an HTML or Markdown document.
+
+    Args:
+        text: HTML or Markdown source
+        direction: Either "lat_to_cyr" or "cyr_to_lat"
+        syntax: "html" or "markdown" (which also allows inline HTML)
+
+    Returns:
+        The document with only its text transliterated
+    """
+    return _convert(text, direction, syntax, final=True)[0]
+
+
+class MarkupTransliterator:
+    """
+    Incremental markup transliteration for documents that arrive in chunks.
+
+    Output is produced up to the last word boundary that no token spans;
+    the rest is held back until the next chunk. An unclosed comment or code
+    block is held back until it closes or the input ends.
+    """
+
+    def __init__(self, direction: str, syntax: str = "html"):
+        if direction not in ("lat_to_cyr", "cyr_to_lat"):
+            raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+        _pattern(syntax)
+        self.direction = direction
+        self.syntax = syntax
+        # Held-back input, preceded by the last character already converted
+        self.pending = ''
+        self.start = 0
+
+    def feed(self, chunk: str) -> str:
+        """Transliterate the next chunk; returns output that is final."""
+        text = self.pending + chunk
+        output, consumed = _convert(text, self.direction, self.syntax, False, self.start)
+        self.start = 1 if consumed else self.start
+        self.pending = text[max(consumed - 1, 0):]
+        return output
+
+    def flush(self) -> str:
+        """Transliterate whatever is held back; call once at end of input."""
+        text, start = self.pending, self.start
+        self.pending = ''
+        self.start = 0
+        return _convert(text, self.direction, self.syntax, True, start)[0]
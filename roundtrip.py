@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Round-trip fidelity checking
+
+Finds the Cyrillic words of a corpus that do not survive Cyrillic → Latin
+→ Cyrillic unchanged (ц → ts → тс, ь dropped, сҳ read back as ш, ...).
+Files are cut into pieces at line breaks and checked on a pool of worker
+processes; results come back in file order as soon as each piece is done,
+so corpora of any size are checked in bounded memory.
+"""
+
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from transliterate import CYRILLIC_TO_LATIN, cyrillic_to_latin_fast, latin_to_cyrillic
+
+
+DEFAULT_JOB_SIZE = 4 << 20  # Bytes of a file checked per job
+DEFAULT_MAX_POSITIONS = 10  # Positions kept per word in a RoundTripReport
+
+# A word is a maximal run of Cyrillic letters; Cyrillic → Latin works letter
+# by letter, so every word round-trips on its own
+_WORD = re.compile('[' + re.escape(''.join(sorted(CYRILLIC_TO_LATIN))) + ']+')
+
+
+class Mismatch(NamedTuple):
+    """A word that comes back different from Cyrillic → Latin → Cyrillic."""
+    word: str
+    latin: str
+    back: str
+
+
+class Occurrence(NamedTuple):
+    """Where a word was found."""
+    path: str
+    line: int    # 1-based
+    column: int  # 1-based, in characters
+
+
+class ChunkResult(NamedTuple):
+    """Round-trip check of one piece of a file."""
+    path: str
+    words: int          # Cyrillic words checked
+    mismatches: dict    # word → Mismatch, for the words that failed
+    occurrences: list   # (word, Occurrence) of every failing word, in text order
+    error: Optional[str] = None
+
+
+# =============================================================================
+# CHECKING
+# =============================================================================
+
+def round_trip(text: str) -> str:
+    """Cyrillic → Latin → Cyrillic."""
+    return latin_to_cyrillic(cyrillic_to_latin_fast(text))
+
+
+def find_mismatches(words) -> dict:
+    """
+    Round-trip distinct words in one conversion per direction.
+
+    Returns:
+        word → Mismatch for every word that does not come back unchanged
+    """
+    words = list(words)
+    if not words:
+        return {}
+    # Words hold only letters, so no combination can run across a line break
+    latin = cyrillic_to_latin_fast('\n'.join(words)).split('\n')
+    back = latin_to_cyrillic('\n'.join(latin)).split('\n')
+    return {word: Mismatch(word, word_latin, word_back)
+            for word, word_latin, word_back in zip(words, latin, back) if word_back != word}
+
+
+def check_text(text: str, path: str = "", first_line: int = 1) -> ChunkResult:
+    """
+    Check every Cyrillic word of `text`.
+
+    Args:
+        text: Text to check
+        path: File name to report in the occurrences
+        first_line: Line number of the first line of `text`
+    """
+    words = _WORD.findall(text)
+    mismatches = find_mismatches(set(words))
+    occurrences = []
+    if mismatches:
+        line = first_line
+        line_start = position = 0
+        for match in _WORD.finditer(text):
+            if match.group() not in mismatches:
+                continue
+            start = match.start()
+            breaks = text.count('\n', position, start)
+            if breaks:
+                line += breaks
+                line_start = text.rfind('\n', position, start) + 1
+            position = start
+            occurrences.append((match.group(), Occurrence(path, line, start - line_start + 1)))
+    return ChunkResult(path, len(words), mismatches, occurrences)
+
+
+# =============================================================================
+# FILES
+# =============================================================================
+
+def split_file(path: str, job_size: int = DEFAULT_JOB_SIZE):
+    """
+    Yield (start, end) byte ranges of about `job_size` covering the file.
+
+    Every range but the first starts right after a line break, which is a
+    character boundary in UTF-8 and other ASCII-compatible encodings.
+    """
+    size = os.path.getsize(path)
+    start = 0
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(start + job_size)
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+def _check_job(job) -> tuple:
+    """
+    Check one byte range of a file; runs inside a worker process.
+
+    Args:
+        job: Tuple of (path, start, end, encoding)
+
+    Returns:
+        (ChunkResult with line numbers counted from the start of the range,
+        number of line breaks in the range)
+    """
+    path, start, end, encoding = job
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            text = f.read(end - start).decode(encoding)
+    except (OSError, UnicodeError) as e:
+        return ChunkResult(path, 0, {}, [], str(e)), 0
+    return check_text(text, path, first_line=0), text.count('\n')
+
+
+def _jobs(paths, job_size: int, encoding: str):
+    for path in paths:
+        try:
+            ranges = list(split_file(path, job_size))
+        except OSError:
+            ranges = [(0, 0)]  # The worker fails to open it too and reports why
+        for start, end in ranges:
+            yield path, start, end, encoding
+
+
+def _run(jobs, workers: int):
+    """Yield (job, result) in job order, with a bounded number of jobs in flight."""
+    if workers == 1:
+        for job in jobs:
+            yield job, _check_job(job)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append((job, pool.submit(_check_job, job)))
+            if len(pending) >= 2 * workers:
+                job, future = pending.popleft()
+                yield job, future.result()
+        while pending:
+            job, future = pending.popleft()
+            yield job, future.result()
+
+
+def check_files(paths, workers: Optional[int] = None, job_size: int = DEFAULT_JOB_SIZE,
+                encoding: str = "utf-8"):
+    """
+    Round-trip check files in parallel, yielding results as they are ready.
+
+    Args:
+        paths: Iterable of file paths
+        workers: Worker processes; None uses one per CPU, 1 checks in the caller
+        job_size: Bytes of a file checked per job
+        encoding: An ASCII-compatible encoding (files are cut after line breaks)
+
+    Returns:
+        Iterator over ChunkResult, in file order; each file's pieces come
+        in order and their positions are counted from the start of the file
+    """
+    if job_size < 1:
+        raise ValueError("job_size must be at least 1")
+    line = 1
+    for (_, start, _, _), (result, breaks) in _run(_jobs(paths, job_size, encoding),
+                                                   workers or os.cpu_count() or 1):
+        if start == 0:
+            line = 1
+        first_line = line
+        line += breaks
+        yield result._replace(occurrences=[
+            (word, occurrence._replace(line=occurrence.line + first_line))
+            for word, occurrence in result.occurrences
+        ])
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+class RoundTripReport:
+    """
+    Totals over a stream of ChunkResults: every failing word with its
+    frequency and its first `max_positions` positions.
+    """
+
+    def __init__(self, max_positions: int = DEFAULT_MAX_POSITIONS):
+        self.max_positions = max_positions
+        self.words = 0
+        self.counts = Counter()
+        self.mismatches = {}
+        self.positions = {}
+        self.errors = []  # (path, message)
+
+    def add(self, result: ChunkResult):
+        """Add the result of one piece."""
+        if result.error:
+            self.errors.append((result.path, result.error))
+            return
+        self.words += result.words
+        self.mismatches.update(result.mismatches)
+        for word, occurrence in result.occurrences:
+            self.counts[word] += 1
+            positions = self.positions.setdefault(word, [])
+            if len(positions) < self.max_positions:
+                positions.append(occurrence)
+
+    @property
+    def failures(self) -> int:
+        """Occurrences of words that do not round-trip."""
+        return sum(self.counts.values())
+
+    def most_common(self):
+        """(Mismatch, count, positions) for every failing word, most frequent first."""
+        return [(self.mismatches[word], count, self.positions[word])
+                for word, count in self.counts.most_common()]
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - Local HTTP transliteration service
+
+A small asyncio HTTP/1.1 server (standard library only) exposing
+transliteration and script detection as JSON endpoints:
+
+    POST /transliterate  {"text": "...", "direction": "lat_to_cyr" | "cyr_to_lat" | "auto"}
+    POST /batch          {"texts": ["...", ...], "direction": ...}
+                         (both accept an optional "standard": a registered alphabet standard)
+    POST /detect         {"text": "..."}
+    GET  /stats          request count, requests/sec and latency percentiles
+
+Connections are kept alive between requests, request bodies are size
+limited, and conversion of anything but tiny inputs runs in a process
+pool so the event loop never blocks.
+
+Usage:
+    python cli.py serve --port 8765
+    python cli.py loadtest --port 8765 --requests 5000
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from transliterate import Standard, detect_script, get_standard, transliterate
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 8 << 20  # Bytes per request body
+MAX_HEADER_SIZE = 16 << 10  # Bytes for request line plus headers
+MAX_BATCH_ITEMS = 100000
+KEEP_ALIVE_TIMEOUT = 15.0  # Seconds an idle connection is kept open
+INLINE_LIMIT = 2048  # Inputs up to this many characters are converted on the loop itself
+BATCH_CHUNK_SIZE = 1 << 18  # Characters per process-pool task when splitting a batch
+LATENCY_WINDOW = 10000  # Latencies kept for percentiles
+
+STATUS_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    408: "Request Timeout", 411: "Length Required", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """Error answered with an HTTP status and a JSON {"error": ...} body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# =============================================================================
+# WORKER FUNCTIONS (run in the process pool; must be top-level to pickle)
+# =============================================================================
+
+def resolve_direction(text: str, direction: str) -> str:
+    """Turn "auto" into a concrete direction for this text."""
+    if direction == "auto":
+        # No letters at all: Cyrillic → Latin leaves such text unchanged
+        return detect_script(text, default="cyr_to_lat").direction
+    return direction
+
+
+def convert_one(text: str, direction: str, standard: Optional[Standard] = None) -> tuple:
+    """Returns (result, direction used)."""
+    direction = resolve_direction(text, direction)
+    return transliterate(text, direction, standard), direction
+
+
+def convert_many(texts: list, direction: str, standard: Optional[Standard] = None) -> list:
+    """Returns a list of (result, direction used)."""
+    return [convert_one(text, direction, standard) for text in texts]
+
+
+def detect(text: str) -> dict:
+    """Detection result as a JSON-ready dict."""
+    return detect_script(text)._asdict()
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies) -> dict:
+    """p50/p90/p99/max of latencies given in seconds, reported in milliseconds."""
+    values = sorted(latencies)
+    return {
+        "p50": percentile(values, 0.50) * 1000,
+        "p90": percentile(values, 0.90) * 1000,
+        "p99": percentile(values, 0.99) * 1000,
+        "max": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+class TransliterationServer:
+    """asyncio HTTP server for transliteration requests."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 workers: Optional[int] = None, max_body_size: int = MAX_BODY_SIZE):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_body_size = max_body_size
+        self.executor = None
+        self.server = None
+        self.started = time.monotonic()
+        self.requests = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self):
+        """Start listening; `self.port` is updated if 0 (any free port) was given."""
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started = time.monotonic()
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled."""
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stop listening and shut the worker pool down."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    # -------------------------------------------------------------------------
+    # Connection handling
+    # -------------------------------------------------------------------------
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it or it idles out."""
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 431, {"error": "Request headers too large"}, False)
+                    break
+
+                start = time.perf_counter()
+                keep_alive = False  # Until the request line has been understood
+                try:
+                    method, path, version, headers = self.parse_head(head)
+                    keep_alive = self.wants_keep_alive(version, headers)
+                    body = await self.read_body(reader, headers)
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    if status in (408, 411, 413):
+                        keep_alive = False  # Unread body left on the connection
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                await self.respond(writer, status, payload, keep_alive)
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def parse_head(self, head: bytes) -> tuple:
+        """Split the request line and headers; header names are lower-cased."""
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, path, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return method, path, version, headers
+
+    def wants_keep_alive(self, version: str, headers: dict) -> bool:
+        """HTTP/1.1 keeps connections open unless asked not to; HTTP/1.0 only if asked."""
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def read_body(self, reader: asyncio.StreamReader, headers: dict) -> bytes:
+        """Read a Content-Length framed body, enforcing the size limit."""
+        if "transfer-encoding" in headers:
+            raise HTTPError(411, "Chunked bodies are not supported; send Content-Length")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body_size:
+            raise HTTPError(413, f"Body larger than {self.max_body_size} bytes")
+        if length <= 0:
+            return b""
+        try:
+            return await asyncio.wait_for(reader.readexactly(length), KEEP_ALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Timed out reading body")
+
+    async def respond(self, writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        """Write a JSON response."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # -------------------------------------------------------------------------
+    # Endpoints
+    # -------------------------------------------------------------------------
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> dict:
+        """Route a request to its endpoint; returns the JSON payload."""
+        path = path.split("?", 1)[0]
+        if path == "/stats":
+            if method != "GET":
+                raise HTTPError(405, "Use GET")
+            return self.stats()
+
+        handlers = {
+            "/transliterate": self.handle_transliterate,
+            "/batch": self.handle_batch,
+            "/detect": self.handle_detect,
+        }
+        handler = handlers.get(path)
+        if handler is None:
+            raise HTTPError(404, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(405, "Use POST")
+        try:
+            request = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(400, "Body must be UTF-8 JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return await handler(request)
+
+    async def run(self, func, *args):
+        """Run CPU-bound work in the process pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def get_direction(self, request: dict) -> str:
+        direction = request.get("direction", "auto")
+        if direction not in ("lat_to_cyr", "cyr_to_lat", "auto"):
+            raise HTTPError(400, "direction must be 'lat_to_cyr', 'cyr_to_lat' or 'auto'")
+        return direction
+
+    def get_standard(self, request: dict) -> Optional[Standard]:
+        # Workers get the Standard itself: they need not have it registered
+        name = request.get("standard")
+        if name is None:
+            return None
+        if not isinstance(name, str):
+            raise HTTPError(400, "'standard' must be a string")
+        try:
+            return get_standard(name)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    def get_text(self, request: dict) -> str:
+        text = request.get("text")
+        if not isinstance(text, str):
+            raise HTTPError(400, "'text' must be a string")
+        return text
+
+    async def handle_transliterate(self, request: dict) -> dict:
+        text, direction = self.get_text(request), self.get_direction(request)
+        standard = self.get_standard(request)
+        if len(text) <= INLINE_LIMIT:
+            result, direction = convert_one(text, direction, standard)
+        else:
+            result, direction = await self.run(convert_one, text, direction, standard)
+        return {"result": result, "direction": direction}
+
+    async def handle_batch(self, request: dict) -> dict:
+        texts, direction = request.get("texts"), self.get_direction(request)
+        standard = self.get_standard(request)
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, "'texts' must be a list of strings")
+        if len(texts) > MAX_BATCH_ITEMS:
+            raise HTTPError(413, f"At most {MAX_BATCH_ITEMS} texts per batch")
+
+        # Group items into tasks of about BATCH_CHUNK_SIZE characters, run them in parallel
+        groups, group, size = [], [], 0
+        for text in texts:
+            group.append(text)
+            size += len(text)
+            if size >= BATCH_CHUNK_SIZE:
+                groups.append(group)
+                group, size = [], 0
+        if group:
+            groups.append(group)
+
+        if len(groups) == 1 and size <= INLINE_LIMIT:
+            results = convert_many(groups[0], direction, standard)
+        else:
+            converted = await asyncio.gather(*(self.run(convert_many, group, direction, standard)
+                                               for group in groups))
+            results = [item for group_results in converted for item in group_results]
+        return {
+            "results": [result for result, _ in results],
+            "directions": [used for _, used in results],
+        }
+
+    async def handle_detect(self, request: dict) -> dict:
+        text = self.get_text(request)
+        if len(text) <= INLINE_LIMIT:
+            return detect(text)
+        return await self.run(detect, text)
+
+    def stats(self) -> dict:
+        """Request count, throughput since start, and recent latency percentiles."""
+        uptime = time.monotonic() - self.started
+        return {
+            "requests": self.requests,
+            "uptime_seconds": uptime,
+            "requests_per_sec": self.requests / uptime if uptime else 0.0,
+            "latency_ms": latency_summary(self.latencies),
+            "workers": self.workers,
+        }
+
+
+# =============================================================================
+# LOAD TEST CLIENT
+# =============================================================================
+
+async def load_test(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, requests: int = 1000,
+                    connections: int = 8, text: str = "Oʻzbekiston Respublikasi — mustaqil respublika.",
+                    path: str = "/transliterate") -> dict:
+    """
+    Send `requests` POSTs over `connections` keep-alive connections.
+
+    Returns:
+        Dict with requests/sec and client-side latency percentiles
+    """
+    body = json.dumps({"text": text, "direction": "auto"}, ensure_ascii=False).encode("utf-8")
+    request = (
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1") + body
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": latency_summary(latencies),
+    }
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+KyrLat - CSV and JSON Lines column conversion
+
+Transliterates selected columns of CSV files or fields of JSON Lines files
+(database exports) while leaving every other byte unchanged: IDs, e-mails,
+numbers, quoting, spacing and line endings are copied as they are. Fields
+are located in the raw text instead of being parsed and re-serialized.
+Records are converted in chunks, optionally on several processes, so
+tables of any length convert in constant memory.
+"""
+
+import itertools
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from json.decoder import scanstring
+
+from bulk import transliterate_array
+from transliterate import APOSTROPHE_VARIANTS, UZBEK_APOSTROPHE, detect_script
+
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 10000  # Records per job
+
+# Characters transliteration can produce or consume besides letters; a CSV
+# delimiter must not be one of them, or converted fields could break rows
+_RESERVED = set(APOSTROPHE_VARIANTS) | {UZBEK_APOSTROPHE, '"', '\r', '\n'}
+
+
+class TableError(ValueError):
+    """A record that cannot be read as CSV or as a JSON object."""
+
+
+# =============================================================================
+# RECORDS
+# =============================================================================
+
+def csv_records(source):
+    """
+    Yield the raw records of a CSV text file opened with newline=''.
+
+    A record spans several lines while a quoted field is open, so records
+    keep their line endings and embedded line breaks exactly.
+    """
+    parts = []
+    quotes = 0
+    for line in source:
+        parts.append(line)
+        quotes += line.count('"')
+        if not quotes % 2:
+            yield ''.join(parts)
+            parts = []
+            quotes = 0
+    if parts:
+        yield ''.join(parts)  # Unterminated quote at the end of the file
+
+
+@lru_cache(maxsize=None)
+def _csv_field(delimiter: str):
+    """A quoted field (group 1 is its content) or an unquoted one."""
+    other = re.escape(delimiter + '\r\n')
+    return re.compile(f'"((?:[^"]|"")*)"[^{other}]*|[^{other}]*')
+
+
+def csv_fields(record: str, delimiter: str = ",", count: int = -1) -> list:
+    """
+    (start, end) of the text of the fields of a raw CSV record.
+
+    Quoted fields give the span inside the quotes, with doubled quotes
+    left as they are; transliteration never touches quotes. With `count`,
+    only the first `count` fields are located.
+    """
+    end = len(record.rstrip('\r\n'))
+    spans = []
+    position = 0
+    if '"' not in record:
+        # Nothing quoted: the fields are what split() gives
+        for field in record[:end].split(delimiter, count)[:count if count >= 0 else None]:
+            spans.append((position, position + len(field)))
+            position += len(field) + 1
+        return spans
+
+    match_field = _csv_field(delimiter).match
+    for _ in range(count if count >= 0 else end + 1):
+        match = match_field(record, position, end)
+        span = match.span(1)
+        spans.append(span if span[0] >= 0 else match.span())
+        position = match.end()
+        if position >= end or record[position] != delimiter:
+            break
+        position += 1
+    return spans
+
+
+def csv_header(record: str, delimiter: str = ",") -> list:
+    """Column names from a raw CSV header record."""
+    names = [record[start:end].replace('""', '"') for start, end in csv_fields(record, delimiter)]
+    names[0] = names[0].lstrip('\ufeff')  # Byte order mark of Excel exports
+    return names
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+def json_fields(line: str, keys) -> list:
+    """
+    Locate the string values of `keys` in one JSON object.
+
+    Returns:
+        (start, end, value) per value found: the span inside its quotes and,
+        if the literal holds escapes, its decoded value (else None)
+    """
+    spans = []
+    try:
+        position = _WHITESPACE.match(line).end()
+        if line[position] != '{':
+            raise TableError("not a JSON object")
+        position = _WHITESPACE.match(line, position + 1).end()
+        if line[position] == '}':
+            return spans
+        while True:
+            if line[position] != '"':
+                raise TableError("expected a key")
+            key, position = scanstring(line, position + 1)
+            position = _WHITESPACE.match(line, position).end()
+            if line[position] != ':':
+                raise TableError("expected ':'")
+            start = _WHITESPACE.match(line, position + 1).end()
+            value, position = _decoder.raw_decode(line, start)
+            if key in keys and isinstance(value, str):
+                escaped = '\\' in line[start:position]
+                spans.append((start + 1, position - 1, value if escaped else None))
+            position = _WHITESPACE.match(line, position).end()
+            if line[position] == '}':
+                return spans
+            if line[position] != ',':
+                raise TableError("expected ',' or '}'")
+            position = _WHITESPACE.match(line, position + 1).end()
+    except IndexError:
+        raise TableError("unexpected end of line") from None
+    except json.JSONDecodeError as e:
+        raise TableError(e.msg) from None
+
+
+# =============================================================================
+# CONVERSION
+# =============================================================================
+
+def _locate(records, fmt: str, columns, delimiter: str, first_record: int):
+    """Per record, the (start, end, value) spans of the fields to convert."""
+    located = []
+    for number, record in enumerate(records, first_record):
+        if fmt == "jsonl":
+            if not record.strip():
+                located.append([])  # Blank lines are copied
+                continue
+            try:
+                located.append(json_fields(record, columns))
+            except TableError as e:
+                raise TableError(f"Record {number}: {e}") from None
+        else:
+            fields = csv_fields(record, delimiter, columns[-1] + 1 if columns else 0)
+            located.append([fields[index] + (None,) for index in columns if index < len(fields)])
+    return located
+
+
+def _field_texts(records, located) -> list:
+    return [record[start:end] if value is None else value
+            for record, spans in zip(records, located) for start, end, value in spans]
+
+
+def convert_records(job) -> str:
+    """
+    Transliterate the selected fields of a chunk of records; runs in the caller or a worker.
+
+    Args:
+        job: Tuple of (records, direction, fmt, columns, delimiter, first_record):
+            raw records, "csv" or "jsonl", column indices (CSV) or keys (JSONL),
+            and the number of the first record, for error messages
+
+    Returns:
+        The records with the selected fields converted, joined
+    """
+    records, direction, fmt, columns, delimiter, first_record = job
+    located = _locate(records, fmt, columns, delimiter, first_record)
+    converted = iter(transliterate_array(_field_texts(records, located), direction))
+
+    output = []
+    for record, spans in zip(records, located):
+        position = 0
+        for start, end, value in spans:
+            text = next(converted)
+            if value is not None:
+                # Decoded because of escapes: encode again, keeping \u escapes if the literal was ASCII
+                literal = record[start:end]
+                text = literal if text == value else json.dumps(text, ensure_ascii=literal.isascii())[1:-1]
+            output.append(record[position:start])
+            output.append(text)
+            position = end
+        output.append(record[position:])
+    return ''.join(output)
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ordered(func, jobs, workers: int):
+    """Yield func(job) for every job in order, with a bounded number of jobs in flight."""
+    if workers == 1:
+        for job in jobs:
+            yield func(job)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(func, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _column_index(column, names) -> int:
+    """Index of a CSV column given by name or by 0-based index."""
+    if isinstance(column, int):
+        return column
+    if names is None:
+        raise ValueError(f"Column {column!r}: names need a header record, give 0-based indices")
+    if column not in names:
+        raise ValueError(f"No column named {column!r}")
+    return names.index(column)
+
+
+def convert_table(source, target, direction: str, columns, fmt: str = "csv", delimiter: str = ",",
+                  header: bool = True, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Transliterate selected columns of a CSV or JSON Lines stream.
+
+    Args:
+        source: Text file object opened for reading with newline=''
+        target: Text file object opened for writing with newline=''
+        direction: "lat_to_cyr", "cyr_to_lat", or "auto" to detect it from
+            the selected fields of the first chunk
+        columns: CSV column names (with a header) or 0-based indices; JSONL
+            field names (top-level keys whose values are strings)
+        fmt: "csv" or "jsonl"
+        delimiter: CSV field delimiter
+        header: Whether the first CSV record holds column names (copied unchanged)
+        workers: Chunks converted in parallel; 1 converts in the caller,
+            None uses one worker process per CPU
+        chunk_size: Records per chunk
+
+    Returns:
+        Number of records read, header included
+    """
+    if direction not in ("lat_to_cyr", "cyr_to_lat", "auto"):
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr', 'cyr_to_lat' or 'auto'")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Use 'csv' or 'jsonl'")
+    if len(delimiter) != 1 or delimiter in _RESERVED:
+        raise ValueError(f"Unusable CSV delimiter: {delimiter!r}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    count = 0
+    if fmt == "jsonl":
+        records = iter(source)
+        columns = frozenset(columns)
+    else:
+        records = csv_records(source)
+        names = None
+        if header:
+            first = next(records, None)
+            if first is None:
+                return 0
+            target.write(first)
+            count = 1
+            names = csv_header(first, delimiter)
+        columns = tuple(sorted(set(_column_index(column, names) for column in columns)))
+
+    chunks = _chunks(records, chunk_size)
+    if direction == "auto":
+        first_chunk = next(chunks, [])
+        located = _locate(first_chunk, fmt, columns, delimiter, count + 1)
+        # No letters at all: Cyrillic → Latin leaves such text unchanged
+        direction = detect_script(' '.join(_field_texts(first_chunk, located)), default="cyr_to_lat").direction
+        chunks = itertools.chain([first_chunk], chunks)
+
+    def jobs():
+        nonlocal count
+        for chunk in chunks:
+            yield chunk, direction, fmt, columns, delimiter, count + 1
+            count += len(chunk)
+
+    for output in _ordered(convert_records, jobs(), workers or os.cpu_count() or 1):
+        target.write(output)
+    return count
@@ -6,10 +6,29 @@ This module provides rule-based transliteration between Uzbek Cyrillic and Latin
 No AI or machine learning - purely deterministic character mapping.
 """
 
+import itertools
+import re
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
 # =============================================================================
 # TEXT NORMALIZATION
 # =============================================================================
 
+UZBEK_APOSTROPHE = '\u02BB'  # ʻ
+
+APOSTROPHE_VARIANTS = (
+    '\u0027',  # ' ASCII apostrophe
+    '\u0060',  # ` grave accent
+    '\u02BC',  # ʼ modifier letter apostrophe
+    '\u2019',  # ' right single quotation mark
+)
+
+_APOSTROPHE_TABLE = str.maketrans({variant: UZBEK_APOSTROPHE for variant in APOSTROPHE_VARIANTS})
+
+
 def normalize_apostrophes(text: str) -> str:
     """
     Normalize all apostrophe-like characters to the standard Uzbek apostrophe (U+02BB).
@@ -25,19 +44,7 @@ def normalize_apostrophes(text: str) -> str:
     To:
     - ʻ (U+02BB, modifier letter turned comma - Uzbek standard)
     """
-    UZBEK_APOSTROPHE = '\u02BB'  # ʻ
-    
-    apostrophe_variants = [
-        '\u0027',  # ' ASCII apostrophe
-        '\u0060',  # ` grave accent
-        '\u02BC',  # ʼ modifier letter apostrophe
-        '\u2019',  # ' right single quotation mark
-    ]
-    
-    for variant in apostrophe_variants:
-        text = text.replace(variant, UZBEK_APOSTROPHE)
-    
-    return text
+    return text.translate(_APOSTROPHE_TABLE)
 
 
 # =============================================================================
@@ -129,6 +136,241 @@ CYRILLIC_TO_LATIN = {
 }
 
 
+# =============================================================================
+# COMPILED ENGINES
+# The mapping tables are compiled once at import time into a regular
+# expression (digraphs) and a str.translate table (single characters).
+# Regexes are compiled on first use, so importing the module stays cheap.
+# =============================================================================
+
+def _apostrophe_spellings(latin: str):
+    """Yield every spelling of `latin` with any apostrophe variant in place of ʻ."""
+    choices = [UZBEK_APOSTROPHE + ''.join(APOSTROPHE_VARIANTS) if char == UZBEK_APOSTROPHE else char
+               for char in latin]
+    for spelling in itertools.product(*choices):
+        yield ''.join(spelling)
+
+
+def _translation_table(mapping: dict) -> list:
+    """
+    Build a str.translate table indexed by codepoint.
+    
+    A dense list is faster to index than the dict from str.maketrans. Unmapped
+    codepoints map to themselves; anything past the end raises IndexError,
+    which str.translate treats as "leave unchanged".
+    """
+    table = list(range(max(map(ord, mapping), default=-1) + 1))
+    for char, replacement in mapping.items():
+        table[ord(char)] = ord(replacement) if len(replacement) == 1 else replacement
+    return table
+
+
+def _char_source(char: str) -> str:
+    """Regex source for one table character; ʻ also accepts un-normalized apostrophes."""
+    if char == UZBEK_APOSTROPHE:
+        return '[' + re.escape(UZBEK_APOSTROPHE + ''.join(APOSTROPHE_VARIANTS)) + ']'
+    return re.escape(char)
+
+
+class _LazyPattern:
+    """
+    A regex compiled the first time it is used.
+    
+    Compiling the scanners takes most of the import time of this module;
+    deferring it keeps `import transliterate` down to a few milliseconds
+    for tools that only need the tables or one direction.
+    """
+    
+    def __init__(self, source: str, flags: int = 0):
+        self.source = source
+        self.flags = flags
+        self.compiled = None
+    
+    def __getattr__(self, name):
+        # Only called for attributes not yet on the wrapper. The Pattern
+        # attribute is kept, so later uses are plain instance lookups.
+        if name.startswith('__'):
+            raise AttributeError(name)  # pickle/copy probes, before __init__ too
+        if self.compiled is None:
+            self.compiled = re.compile(self.source, self.flags)
+        value = getattr(self.compiled, name)
+        setattr(self, name, value)
+        return value
+
+
+def _trie_priority(node: dict) -> int:
+    """Best (lowest) priority of any combination below `node`."""
+    return min(child[0] if char is None else _trie_priority(child) for char, child in node.items())
+
+
+def _trie_source(node: dict) -> str:
+    """
+    Regex source for a trie of combinations, so the scan tests one branch per character.
+    
+    A node maps characters to child nodes; the key None holds (priority, guard)
+    when a combination ends at that node. Branches are ordered by priority.
+    """
+    branches = []
+    for char, child in node.items():
+        if char is None:
+            priority, guard = child
+            branches.append((priority, guard))
+        else:
+            branches.append((_trie_priority(child), _char_source(char) + _trie_source(child)))
+    branches.sort(key=lambda branch: branch[0])
+    if len(branches) == 1:
+        return branches[0][1]
+    return '(?:' + '|'.join(source for _, source in branches) + ')'
+
+
+class LatinToCyrillicEngine:
+    """
+    Latin → Cyrillic tables compiled into one regex scan plus one translate.
+    
+    The tables are defined as ordered replacement passes over `multi`, so when
+    two combinations overlap the one listed EARLIER wins, even if it starts later
+    in the text (e.g. "yoʻ" → "йў", but "Yoʻ" → "Ёъ"). To reproduce that in a
+    single left-to-right scan, each combination gets a negative lookahead for
+    every earlier combination that could start inside it and run past it.
+    """
+    
+    def __init__(self, multi, single):
+        trie = {}
+        self.lookup = {}
+        # How far past a scan position the regex may look to decide a match
+        self.context = 1
+        for index, (latin, cyrillic) in enumerate(multi):
+            guards = []
+            for earlier, _ in multi[:index]:
+                if earlier in latin:
+                    break  # Earlier pass always consumes part of this combination
+                for offset in range(1, len(latin)):
+                    tail = latin[offset:]
+                    if earlier.startswith(tail) and len(earlier) > len(tail):
+                        remainder = earlier[len(tail):]
+                        guards.append('(?!' + ''.join(map(_char_source, remainder)) + ')')
+                        self.context = max(self.context, len(latin) + len(remainder))
+            else:
+                node = trie
+                for char in latin:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, (index, ''.join(guards)))
+                for spelling in _apostrophe_spellings(latin):
+                    self.lookup.setdefault(spelling, cyrillic)
+                self.context = max(self.context, len(latin))
+        
+        table = {variant: single.get(UZBEK_APOSTROPHE, UZBEK_APOSTROPHE) for variant in APOSTROPHE_VARIANTS}
+        table.update(single)
+        self.table = _translation_table(table)
+        
+        # One capturing group: split() then yields [plain, combination, plain, ...]
+        self.pattern = _LazyPattern('(' + _trie_source(trie) + ')' if trie else '(?!)')
+    
+    def __call__(self, text: str) -> str:
+        return self.map_letters(self.replace_combinations(text))
+    
+    def replace_combinations(self, text: str) -> str:
+        """Stage 1: replace multi-character combinations (sh, gʻ, ...) in one scan."""
+        parts = self.pattern.split(text)
+        parts[1::2] = map(self.lookup.__getitem__, parts[1::2])
+        return ''.join(parts)
+    
+    def map_letters(self, text: str) -> str:
+        """Stage 2: map single letters and leftover apostrophes."""
+        return text.translate(self.table)
+    
+    def convert_prefix(self, text: str, limit: int):
+        """
+        Convert the part of `text` that no longer depends on what follows it.
+        
+        Every match decision at a position before `limit` must have been made
+        with `self.context` characters of lookahead available. Returns
+        (output, consumed); text[consumed:] must be fed again with more input.
+        """
+        parts = self.pattern.split(text)
+        output = []
+        position = 0
+        for index, part in enumerate(parts):
+            if index % 2:
+                if position >= limit:
+                    break
+                output.append(self.lookup[part])
+            elif position + len(part) > limit:
+                keep = max(limit - position, 0)
+                output.append(part[:keep])
+                position += keep
+                break
+            else:
+                output.append(part)
+            position += len(part)
+        return ''.join(output).translate(self.table), position
+    
+    def convert_pieces(self, pieces) -> list:
+        """
+        Convert consecutive pieces of one text as if they were joined.
+        
+        Returns one output per piece. A combination that spans pieces (an
+        "s" ending one piece and an "h" starting the next) is converted as a
+        whole and goes to the piece where it starts.
+        """
+        pieces = list(pieces)
+        outputs = [[] for _ in pieces]
+        if not pieces:
+            return []
+        last = len(pieces) - 1
+        piece = 0
+        piece_end = len(pieces[0])
+        position = 0
+        for index, part in enumerate(self.pattern.split(''.join(pieces))):
+            while position >= piece_end and piece < last:
+                piece += 1
+                piece_end += len(pieces[piece])
+            if index % 2:
+                outputs[piece].append(self.lookup[part])
+                position += len(part)
+                continue
+            while part:
+                take = len(part) if piece == last else min(len(part), piece_end - position)
+                outputs[piece].append(part[:take])
+                part = part[take:]
+                position += take
+                if part:
+                    piece += 1
+                    piece_end += len(pieces[piece])
+        return [''.join(output).translate(self.table) for output in outputs]
+
+
+class CyrillicToLatinEngine:
+    """
+    Cyrillic → Latin tables compiled into one str.translate, plus one regex
+    scan for letters written differently at the start of a word (е → ye).
+    """
+    
+    def __init__(self, mapping, initial=None):
+        self.table = _translation_table(mapping)
+        self.initial = dict(initial or {})
+        # Not preceded by a letter; one capturing group, as in LatinToCyrillicEngine
+        self.pattern = _LazyPattern(
+            '(?<![^\\W\\d_])([' + re.escape(''.join(sorted(self.initial))) + '])'
+        ) if self.initial else None
+    
+    def __call__(self, text: str) -> str:
+        if self.pattern is None:
+            return text.translate(self.table)
+        parts = self.pattern.split(text)
+        parts[::2] = [part.translate(self.table) for part in parts[::2]]
+        parts[1::2] = map(self.initial.__getitem__, parts[1::2])
+        return ''.join(parts)
+
+
+_latin_to_cyrillic = LatinToCyrillicEngine(LATIN_TO_CYRILLIC_MULTI, LATIN_TO_CYRILLIC_SINGLE)
+
+# Cyrillic → Latin is purely per-character, so a codepoint table is enough.
+# Multi-character outputs (Ё → Yo, Ғ → Gʻ) and deletions (Ь → '') included.
+_cyrillic_to_latin = CyrillicToLatinEngine(CYRILLIC_TO_LATIN)
+CYRILLIC_TO_LATIN_TABLE = _cyrillic_to_latin.table
+
+
 # =============================================================================
 # TRANSLITERATION FUNCTIONS
 # =============================================================================
@@ -137,30 +379,14 @@ def latin_to_cyrillic(text: str) -> str:
     """
     Transliterate Latin text to Cyrillic.
     
-    Process order:
+    Process order (done in one scan by the compiled engine):
     1. Normalize apostrophes
     2. Replace multi-character combinations FIRST
     3. Replace single characters
     
     Numbers, spaces, and punctuation remain unchanged.
     """
-    # Step 0: Normalize apostrophes
-    text = normalize_apostrophes(text)
-    
-    # Step 1: Process multi-character combinations FIRST (order matters!)
-    for latin, cyrillic in LATIN_TO_CYRILLIC_MULTI:
-        text = text.replace(latin, cyrillic)
-    
-    # Step 2: Process single characters
-    result = []
-    for char in text:
-        if char in LATIN_TO_CYRILLIC_SINGLE:
-            result.append(LATIN_TO_CYRILLIC_SINGLE[char])
-        else:
-            # Keep numbers, spaces, punctuation unchanged
-            result.append(char)
-    
-    return ''.join(result)
+    return _latin_to_cyrillic(text)
 
 
 def cyrillic_to_latin(text: str) -> str:
@@ -169,6 +395,8 @@ def cyrillic_to_latin(text: str) -> str:
     
     Output uses ʻ (U+02BB) as the standard Uzbek apostrophe.
     Numbers, spaces, and punctuation remain unchanged.
+    
+    Reference implementation; cyrillic_to_latin_fast() gives the same result.
     """
     result = []
     for char in text:
@@ -181,21 +409,640 @@ def cyrillic_to_latin(text: str) -> str:
     return ''.join(result)
 
 
-def transliterate(text: str, direction: str) -> str:
+def cyrillic_to_latin_fast(text: str) -> str:
+    """
+    Transliterate Cyrillic text to Latin using the precompiled CYRILLIC_TO_LATIN_TABLE.
+    
+    Same output as cyrillic_to_latin(), but the whole string is mapped by
+    str.translate instead of a per-character Python loop.
+    """
+    return text.translate(CYRILLIC_TO_LATIN_TABLE)
+
+
+def transliterate(text: str, direction: str, standard=None) -> str:
     """
     Main transliteration function.
     
     Args:
         text: Input text to transliterate
         direction: Either "lat_to_cyr" or "cyr_to_lat"
+        standard: Alphabet standard, as a registered name or a Standard
+            (default: the 1995 tables)
     
     Returns:
         Transliterated text
     """
+    if standard is not None:
+        return _transliterate_standard(text, direction, standard)
+    if _stage_hooks:
+        return _transliterate_instrumented(text, direction, _latin_to_cyrillic, _cyrillic_to_latin)
+    
     if direction == "lat_to_cyr":
         return latin_to_cyrillic(text)
     elif direction == "cyr_to_lat":
-        return cyrillic_to_latin(text)
+        return cyrillic_to_latin_fast(text)
+    else:
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+
+
+# =============================================================================
+# ALPHABET STANDARDS
+# Alternative mapping tables (newer Latin orthographies, in-house rules) are
+# registered by name, validated, and compiled into engines on first use.
+# Engines are cached by a fingerprint of the rules, so switching standards
+# per call costs two dict lookups after the first.
+# =============================================================================
+
+DEFAULT_STANDARD = "1995"
+
+# Never part of a key or a replacement: batch helpers join texts with them
+_SEPARATORS = '\x00\n\r'
+
+
+class Standard(NamedTuple):
+    """A validated alphabet standard; create with register_standard()."""
+    name: str
+    fingerprint: str      # Hash of the rules; equal rules share compiled engines
+    latin_multi: tuple    # Latin → Cyrillic combinations, (latin, cyrillic), earlier wins
+    latin_single: dict    # Latin → Cyrillic single characters
+    cyrillic: dict        # Cyrillic → Latin per letter
+    cyrillic_initial: dict  # Cyrillic → Latin at the start of a word, overriding `cyrillic`
+
+
+_standards = {}
+_standard_engines = {}  # fingerprint → (LatinToCyrillicEngine, CyrillicToLatinEngine)
+
+
+def _check_mapping(mapping, what: str) -> dict:
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{what} must be a dict")
+    for key, value in mapping.items():
+        if not isinstance(key, str) or len(key) != 1 or not isinstance(value, str):
+            raise ValueError(f"{what}: {key!r} → {value!r} must map one character to a string")
+        if any(char in _SEPARATORS for char in key + value):
+            raise ValueError(f"{what}: {key!r} → {value!r} contains a line break or NUL")
+    return dict(mapping)
+
+
+def _fingerprint(*tables) -> str:
+    import hashlib  # Only needed once standards are used
+    return hashlib.sha256(repr(tables).encode("utf-8")).hexdigest()
+
+
+def register_standard(name: str, latin_multi, latin_single: dict, cyrillic: dict,
+                      cyrillic_initial: Optional[dict] = None) -> Standard:
+    """
+    Validate an alphabet standard and register it under `name`.
+    
+    Args:
+        name: Name to select the standard by (an existing one is replaced)
+        latin_multi: (latin, cyrillic) combinations of two or more characters;
+            when two overlap, the one listed earlier wins
+        latin_single: Latin → Cyrillic single characters
+        cyrillic: Cyrillic → Latin per letter
+        cyrillic_initial: Cyrillic → Latin for letters at the start of a word,
+            e.g. {'е': 'ye', 'Е': 'Ye'}
+    
+    Returns:
+        The registered Standard
+    
+    Example:
+        register_standard("office", LATIN_TO_CYRILLIC_MULTI, LATIN_TO_CYRILLIC_SINGLE,
+                          {**CYRILLIC_TO_LATIN, 'ц': 's', 'Ц': 'S'}, {'е': 'ye', 'Е': 'Ye'})
+    """
+    standard = _build_standard(name, latin_multi, latin_single, cyrillic, cyrillic_initial)
+    _registry()[name] = standard
+    return standard
+
+
+def _build_standard(name: str, latin_multi, latin_single: dict, cyrillic: dict,
+                    cyrillic_initial: Optional[dict]) -> Standard:
+    """Validate the tables of a standard (see register_standard())."""
+    if not isinstance(name, str) or not name:
+        raise ValueError("Standard name must be a non-empty string")
+    multi = []
+    seen = set()
+    for pair in latin_multi:
+        if (not isinstance(pair, (tuple, list)) or len(pair) != 2
+                or not all(isinstance(part, str) for part in pair) or len(pair[0]) < 2):
+            raise ValueError(f"latin_multi: {pair!r} must be a (latin, cyrillic) pair of 2+ Latin characters")
+        if pair[0] in seen:
+            raise ValueError(f"latin_multi: {pair[0]!r} is listed twice")
+        if any(char in _SEPARATORS for char in pair[0] + pair[1]):
+            raise ValueError(f"latin_multi: {pair!r} contains a line break or NUL")
+        seen.add(pair[0])
+        multi.append((pair[0], pair[1]))
+    single = _check_mapping(latin_single, "latin_single")
+    letters = _check_mapping(cyrillic, "cyrillic")
+    initial = _check_mapping(cyrillic_initial or {}, "cyrillic_initial")
+    missing = set(initial) - set(letters)
+    if missing:
+        raise ValueError(f"cyrillic_initial: {''.join(sorted(missing))!r} not in the cyrillic table")
+    
+    fingerprint = _fingerprint(tuple(multi), sorted(single.items()), sorted(letters.items()),
+                               sorted(initial.items()))
+    return Standard(name, fingerprint, tuple(multi), single, letters, initial)
+
+
+def _registry() -> dict:
+    """Registered standards; the 1995 tables are registered on first use."""
+    if not _standards:
+        default = _build_standard(DEFAULT_STANDARD, LATIN_TO_CYRILLIC_MULTI,
+                                  LATIN_TO_CYRILLIC_SINGLE, CYRILLIC_TO_LATIN, None)
+        _standards[DEFAULT_STANDARD] = default
+        # Same rules, same engines: the module's own
+        _standard_engines[default.fingerprint] = (_latin_to_cyrillic, _cyrillic_to_latin)
+    return _standards
+
+
+def get_standard(name: str) -> Standard:
+    """The standard registered under `name`."""
+    registry = _registry()
+    if name not in registry:
+        raise ValueError(f"Unknown standard: {name}. Registered: {', '.join(sorted(registry))}")
+    return registry[name]
+
+
+def standard_names() -> list:
+    """Names of all registered standards."""
+    return sorted(_registry())
+
+
+def standard_engines(standard) -> tuple:
+    """
+    Compiled (Latin → Cyrillic, Cyrillic → Latin) engines of a standard.
+    
+    Args:
+        standard: A registered name, or a Standard (e.g. received from
+            another process, where it need not be registered)
+    """
+    if isinstance(standard, str):
+        standard = get_standard(standard)
+    engines = _standard_engines.get(standard.fingerprint)
+    if engines is None:
+        engines = _standard_engines[standard.fingerprint] = (
+            LatinToCyrillicEngine(list(standard.latin_multi), standard.latin_single),
+            CyrillicToLatinEngine(standard.cyrillic, standard.cyrillic_initial),
+        )
+    return engines
+
+
+def _transliterate_standard(text: str, direction: str, standard) -> str:
+    latin_engine, cyrillic_engine = standard_engines(standard)
+    if _stage_hooks:
+        return _transliterate_instrumented(text, direction, latin_engine, cyrillic_engine)
+    if direction == "lat_to_cyr":
+        return latin_engine(text)
+    elif direction == "cyr_to_lat":
+        return cyrillic_engine(text)
+    else:
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+
+
+# =============================================================================
+# INSTRUMENTATION
+# Opt-in per-stage timings for transliterate(). While no hook is registered
+# the only cost is one check of an empty list per call.
+# =============================================================================
+
+_stage_hooks = []
+
+
+class StageRecord(NamedTuple):
+    """One timed stage of one transliterate() call, passed to stage hooks."""
+    direction: str
+    stage: str  # "combinations", "letters", or "total" for the whole call
+    seconds: float
+    chars_in: int
+    chars_out: int
+
+
+def add_stage_hook(callback):
+    """
+    Register callback(record) to receive a StageRecord for every stage of every
+    transliterate() call. Apostrophe normalization is part of the
+    "combinations" and "letters" stages, not a separate pass.
+    """
+    if callback not in _stage_hooks:
+        _stage_hooks.append(callback)
+
+
+def remove_stage_hook(callback):
+    """Unregister a callback added with add_stage_hook()."""
+    if callback in _stage_hooks:
+        _stage_hooks.remove(callback)
+
+
+class StageStats:
+    """Stage hook that aggregates call counts, time and sizes per (direction, stage)."""
+    
+    def __init__(self):
+        self.stages = {}
+    
+    def __call__(self, record: StageRecord):
+        entry = self.stages.get((record.direction, record.stage))
+        if entry is None:
+            entry = self.stages[(record.direction, record.stage)] = {
+                'calls': 0, 'seconds': 0.0, 'chars_in': 0, 'chars_out': 0, 'max_seconds': 0.0,
+            }
+        entry['calls'] += 1
+        entry['seconds'] += record.seconds
+        entry['chars_in'] += record.chars_in
+        entry['chars_out'] += record.chars_out
+        entry['max_seconds'] = max(entry['max_seconds'], record.seconds)
+    
+    def as_dict(self) -> dict:
+        """Flat, JSON-ready view keyed by "direction.stage"."""
+        return {f"{direction}.{stage}": dict(entry) for (direction, stage), entry in self.stages.items()}
+
+
+@contextmanager
+def collect_stage_stats():
+    """
+    Collect stage timings for every transliterate() call inside the block.
+    
+    Example:
+        with collect_stage_stats() as stats:
+            transliterate(text, "lat_to_cyr")
+        print(stats.as_dict())
+    """
+    stats = StageStats()
+    add_stage_hook(stats)
+    try:
+        yield stats
+    finally:
+        remove_stage_hook(stats)
+
+
+def _emit(record: StageRecord):
+    """Send a record to every registered hook."""
+    for callback in list(_stage_hooks):
+        callback(record)
+
+
+def _transliterate_instrumented(text: str, direction: str, latin_engine: LatinToCyrillicEngine,
+                                cyrillic_engine: CyrillicToLatinEngine) -> str:
+    """transliterate() with each stage run and timed separately."""
+    clock = time.perf_counter
+    start = clock()
+    if direction == "lat_to_cyr":
+        combined = latin_engine.replace_combinations(text)
+        middle = clock()
+        result = latin_engine.map_letters(combined)
+        end = clock()
+        _emit(StageRecord(direction, "combinations", middle - start, len(text), len(combined)))
+        _emit(StageRecord(direction, "letters", end - middle, len(combined), len(result)))
+    elif direction == "cyr_to_lat":
+        result = cyrillic_engine(text)
+        end = clock()
+        _emit(StageRecord(direction, "letters", end - start, len(text), len(result)))
+    else:
+        raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+    _emit(StageRecord(direction, "total", end - start, len(text), len(result)))
+    return result
+
+
+# =============================================================================
+# SCRIPT DETECTION
+# =============================================================================
+
+# Letter pairs typical of Uzbek Latin text
+UZBEK_LATIN_MARKERS = ('g\u02BB', 'o\u02BB', 'sh', 'ch', 'ng', 'yo', 'yu', 'ya')
+
+# Large inputs are sampled as this many evenly spaced windows
+DETECTION_WINDOWS = 8
+# Suggested sample size for callers that detect on whole files
+DETECTION_SAMPLE_SIZE = 1 << 16
+
+_MARKER_PATTERN = _LazyPattern('|'.join(
+    ''.join(_char_source(char) if char == UZBEK_APOSTROPHE else f'[{char}{char.upper()}]' for char in marker)
+    for marker in UZBEK_LATIN_MARKERS
+))
+
+
+class Detection(NamedTuple):
+    """Result of detect_script()."""
+    direction: Optional[str]  # "cyr_to_lat", "lat_to_cyr", or the default if no letters found
+    confidence: float  # Share of letters belonging to the detected script (0.0 - 1.0)
+    cyrillic: int  # Cyrillic letters counted
+    latin: int  # Latin letters counted
+    markers: int  # Uzbek Latin letter pairs (sh, gʻ, ...) counted
+
+
+def count_scripts(text: str) -> tuple:
+    """
+    Count Cyrillic and Latin letters in text.
+    
+    Characters are tallied in a single C-level pass (collections.Counter);
+    only the distinct characters are then classified in Python.
+    
+    Returns:
+        (cyrillic_count, latin_count)
+    """
+    cyrillic_count = latin_count = 0
+    for char, count in Counter(text).items():
+        if '\u0400' <= char <= '\u04FF':
+            cyrillic_count += count
+        elif 'a' <= char.lower() <= 'z':
+            latin_count += count
+    return cyrillic_count, latin_count
+
+
+def sample_text(text: str, sample_size: Optional[int]) -> str:
+    """
+    Return at most about `sample_size` characters representative of text.
+    
+    Short text is returned as-is; longer text is cut into DETECTION_WINDOWS
+    evenly spaced windows joined by newlines.
+    """
+    if sample_size is None or len(text) <= sample_size:
+        return text
+    window = max(sample_size // DETECTION_WINDOWS, 1)
+    step = (len(text) - window) / (DETECTION_WINDOWS - 1)
+    return '\n'.join(text[int(i * step):int(i * step) + window] for i in range(DETECTION_WINDOWS))
+
+
+def detect_script(text: str, sample_size: Optional[int] = None, default: Optional[str] = None) -> Detection:
+    """
+    Detect whether text is mostly Cyrillic or Latin.
+    
+    Args:
+        text: Input text
+        sample_size: If given, only about this many characters are examined
+        default: Direction to return when the text contains no letters
+    
+    Returns:
+        Detection with the direction to transliterate in and a confidence value
+    """
+    sample = sample_text(text, sample_size)
+    cyrillic_count, latin_count = count_scripts(sample)
+    markers = _MARKER_PATTERN.subn('', sample)[1] if latin_count else 0
+    
+    if cyrillic_count > latin_count:
+        direction = 'cyr_to_lat'
+    elif latin_count > 0:
+        direction = 'lat_to_cyr'
+    else:
+        return Detection(default, 0.0, 0, 0, 0)
+    
+    confidence = max(cyrillic_count, latin_count) / (cyrillic_count + latin_count)
+    return Detection(direction, confidence, cyrillic_count, latin_count, markers)
+
+
+# =============================================================================
+# MIXED-SCRIPT TEXT
+# =============================================================================
+
+# ASCII letters the tables leave alone (w, c) still count as Latin text.
+# Spelled out: the string module compiles a regex when imported.
+_ASCII_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_LATIN_LETTERS = sorted(
+    (set(_ASCII_LETTERS) | set(LATIN_TO_CYRILLIC_SINGLE)
+     | {char for latin, _ in LATIN_TO_CYRILLIC_MULTI for char in latin})
+    - {UZBEK_APOSTROPHE}
+)
+_LATIN_CLASS = '[' + re.escape(''.join(_LATIN_LETTERS)) + ']'
+_CYRILLIC_CLASS = '[' + re.escape(''.join(sorted(CYRILLIC_TO_LATIN))) + ']'
+_NOT_CYRILLIC_CLASS = '[^' + re.escape(''.join(sorted(CYRILLIC_TO_LATIN))) + ']'
+_APOSTROPHE_CLASS = _char_source(UZBEK_APOSTROPHE)
+
+# A script run: Latin letters with the apostrophes inside or right after them
+# (oʻ, gʻ, ra'no), or Cyrillic letters. Anything else lies between runs.
+_SCRIPT_RUN = _LazyPattern(
+    f'(?P<latin>{_LATIN_CLASS}(?:{_LATIN_CLASS}|{_APOSTROPHE_CLASS})*)|(?P<cyrillic>{_CYRILLIC_CLASS}+)'
+)
+# Everything from a Latin letter up to the last Latin run before the next
+# Cyrillic letter, so consecutive Latin words are converted in one call
+_LATIN_SPAN = _LazyPattern(
+    f'{_LATIN_CLASS}(?:{_NOT_CYRILLIC_CLASS}*{_LATIN_CLASS})?{_APOSTROPHE_CLASS}*'
+)
+
+
+def split_scripts(text: str):
+    """
+    Split text into script runs in one pass.
+    
+    Yields:
+        (script, start, end) where script is "latin", "cyrillic" or "other";
+        the runs cover text completely and in order
+    """
+    position = 0
+    for match in _SCRIPT_RUN.finditer(text):
+        if match.start() > position:
+            yield "other", position, match.start()
+        yield match.lastgroup, match.start(), match.end()
+        position = match.end()
+    if position < len(text):
+        yield "other", position, len(text)
+
+
+def transliterate_mixed(text: str, target: str) -> str:
+    """
+    Convert only the parts of a mixed-script text that are not in `target` script.
+    
+    Runs already in the target script (and apostrophes used as quotes around
+    them) are left untouched; if nothing needs converting, `text` itself is
+    returned without copying.
+    
+    Args:
+        text: Input text, possibly mixing Latin and Cyrillic
+        target: Either "cyrillic" or "latin"
+    
+    Returns:
+        Text written entirely in the target script
+    """
+    if target == "cyrillic":
+        return _LATIN_SPAN.sub(lambda match: _latin_to_cyrillic(match.group()), text)
+    elif target == "latin":
+        # Cyrillic → Latin only ever touches Cyrillic letters
+        return cyrillic_to_latin_fast(text) if re.search(_CYRILLIC_CLASS, text) else text
+    else:
+        raise ValueError(f"Unknown target: {target}. Use 'cyrillic' or 'latin'")
+
+
+# =============================================================================
+# WORD CACHE
+# =============================================================================
+
+DEFAULT_WORD_CACHE_SIZE = 50000
+
+# Words are maximal runs of characters the tables can combine; splitting
+# between them never breaks a combination. One capturing group, so split()
+# yields [other, word, other, word, ...].
+_WORD_PATTERNS = {
+    "lat_to_cyr": _LazyPattern(f'((?:{_LATIN_CLASS}|{_APOSTROPHE_CLASS})+)'),
+    "cyr_to_lat": _LazyPattern(f'({_CYRILLIC_CLASS}+)'),
+}
+
+
+class WordCache:
+    """
+    Word-level LRU cache in front of transliterate().
+    
+    Natural text repeats the same few thousand words over and over; each
+    distinct (word, direction) is converted once and then served from the
+    cache. Words missing from the cache are converted together in a single
+    transliterate() call. Not thread-safe; use one instance per thread.
+    """
+    
+    def __init__(self, capacity: int = DEFAULT_WORD_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def transliterate(self, text: str, direction: str) -> str:
+        """Same result as transliterate(text, direction), using cached words."""
+        pattern = _WORD_PATTERNS.get(direction)
+        if pattern is None:
+            raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+        
+        parts = pattern.split(text)
+        entries = self.entries
+        missing = {}
+        for index in range(1, len(parts), 2):
+            key = (parts[index], direction)
+            converted = entries.get(key)
+            if converted is None:
+                missing.setdefault(key, []).append(index)
+            else:
+                self.hits += 1
+                entries.move_to_end(key)
+                parts[index] = converted
+        
+        if missing:
+            # Words never contain newlines, so one call converts all of them
+            converted_words = transliterate('\n'.join(word for word, _ in missing), direction).split('\n')
+            for (key, indexes), converted in zip(missing.items(), converted_words):
+                self.misses += 1
+                self.hits += len(indexes) - 1
+                for index in indexes:
+                    parts[index] = converted
+                self.store(key, converted)
+        
+        return ''.join(parts)
+    
+    def store(self, key: tuple, converted: str):
+        """Add an entry, evicting the least recently used one if full."""
+        if self.capacity <= 0:
+            return
+        self.entries[key] = converted
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> dict:
+        """Counters for sizing the cache: hits, misses, evictions, size, capacity, hit_rate."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+    
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+def transliterate_words(text: str, direction: str, cache: Optional[WordCache] = None) -> str:
+    """
+    Transliterate word by word through an LRU cache.
+    
+    Args:
+        text: Input text to transliterate
+        direction: Either "lat_to_cyr" or "cyr_to_lat"
+        cache: WordCache to use (default: the shared `word_cache`)
+    
+    Returns:
+        Transliterated text, identical to transliterate(text, direction)
+    """
+    return (cache or word_cache).transliterate(text, direction)
+
+
+# Shared cache used by transliterate_words() when no cache is passed
+word_cache = WordCache()
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+class StreamTransliterator:
+    """
+    Incremental transliteration for text that arrives in chunks.
+    
+    Text that could still be part of a combination (an "s" at the end of one
+    chunk waiting for an "h", an "o" waiting for "ʻ") is held back until the
+    next chunk, so the joined output always equals transliterate() of the
+    joined input. At most a few characters are ever held back.
+    """
+    
+    def __init__(self, direction: str):
+        if direction not in ("lat_to_cyr", "cyr_to_lat"):
+            raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
+        self.direction = direction
+        self.pending = ''
+    
+    def feed(self, chunk: str) -> str:
+        """Transliterate the next chunk; returns output that is final."""
+        if self.direction == "cyr_to_lat":
+            return cyrillic_to_latin_fast(chunk)
+        
+        text = self.pending + chunk
+        limit = len(text) - _latin_to_cyrillic.context + 1
+        output, consumed = _latin_to_cyrillic.convert_prefix(text, limit)
+        self.pending = text[consumed:]
+        return output
+    
+    def flush(self) -> str:
+        """Transliterate whatever is held back; call once at end of input."""
+        text, self.pending = self.pending, ''
+        return transliterate(text, self.direction)
+
+
+def transliterate_stream(chunks, direction: str):
+    """
+    Transliterate an iterable of text chunks, yielding output as it becomes final.
+    
+    Args:
+        chunks: Iterable of strings (e.g. fixed-size reads from a file)
+        direction: Either "lat_to_cyr" or "cyr_to_lat"
+    """
+    stream = StreamTransliterator(direction)
+    for chunk in chunks:
+        output = stream.feed(chunk)
+        if output:
+            yield output
+    output = stream.flush()
+    if output:
+        yield output
+
+
+def transliterate_pieces(pieces, direction: str) -> list:
+    """
+    Transliterate consecutive pieces of one text, e.g. the formatting runs of a paragraph.
+    
+    The joined output equals transliterate() of the joined input, and each
+    piece keeps the output of its own characters. A combination split across
+    pieces ("s" | "h") is converted once and kept with the piece it starts in.
+    
+    Args:
+        pieces: Iterable of strings
+        direction: Either "lat_to_cyr" or "cyr_to_lat"
+    
+    Returns:
+        List with one transliterated string per piece
+    """
+    if direction == "lat_to_cyr":
+        return _latin_to_cyrillic.convert_pieces(pieces)
+    elif direction == "cyr_to_lat":
+        return [cyrillic_to_latin_fast(piece) for piece in pieces]
     else:
         raise ValueError(f"Unknown direction: {direction}. Use 'lat_to_cyr' or 'cyr_to_lat'")
 